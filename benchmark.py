@@ -0,0 +1,255 @@
+"""Benchmark every conversion path against deterministic synthetic PDFs.
+
+Generates a small corpus with PyMuPDF (text-heavy, scanned/image-heavy,
+many-page and large-page documents), runs each engine path at the high and
+draft DPI settings in a fresh process and writes machine-readable JSON:
+
+    python benchmark.py -o bench.json
+    python benchmark.py -o new.json --baseline bench.json   # show speed changes
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from conversion_metrics import path_bytes
+from converter_engine import ENGINE_VERSION, ConversionSettings, check_available_libraries, convert_one
+
+SEED = 1234
+
+# name -> (output format, docx method, depends on DPI)
+CONVERSION_PATHS = {
+    "docx_image_based": ("docx", "image_based", True),
+    "docx_text_based": ("docx", "text_based", False),
+    "docx_auto": ("docx", "auto", True),
+    "png": ("png", "image_based", True),
+    "jpg": ("jpg", "image_based", True),
+    "webp": ("webp", "image_based", True),
+    "txt": ("txt", "image_based", False),
+    "pdf": ("pdf", "image_based", False),
+}
+
+PAPER_NOISE = bytes(value | 0xC0 for value in range(256))
+
+WORDS = ("invoice contract total amount party agreement page section clause payment "
+         "delivery schedule report summary figure table annex signature date").split()
+
+
+def random_paragraph(rng, words=60):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def make_text_heavy(path, pages, rng):
+    import fitz
+    doc = fitz.open()
+    for _ in range(pages):
+        page = doc.new_page()
+        text = "\n\n".join(random_paragraph(rng) for _ in range(8))
+        page.insert_textbox(fitz.Rect(50, 50, page.rect.width - 50, page.rect.height - 50), text, fontsize=10)
+    doc.save(path)
+    doc.close()
+
+
+def make_scanned(path, pages, rng):
+    """Full-page noisy grayscale images and no text layer, like a scanner produces"""
+    import fitz
+    doc = fitz.open()
+    width, height = 1275, 1650  # Letter at 150 DPI
+    for _ in range(pages):
+        page = doc.new_page()
+        # Light-grey paper noise
+        samples = rng.randbytes(width * height).translate(PAPER_NOISE)
+        pix = fitz.Pixmap(fitz.csGRAY, width, height, samples, False)
+        page.insert_image(page.rect, pixmap=pix)
+    doc.save(path, deflate=True)
+    doc.close()
+
+
+def make_many_pages(path, pages, rng):
+    import fitz
+    doc = fitz.open()
+    for page_num in range(pages):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Log page {page_num + 1}", fontsize=14)
+        page.insert_textbox(fitz.Rect(72, 100, 540, 300), random_paragraph(rng, 30), fontsize=9)
+    doc.save(path)
+    doc.close()
+
+
+def make_large_page(path, pages, rng):
+    """A0 sheets full of vector line work, like engineering drawings"""
+    import fitz
+    doc = fitz.open()
+    for _ in range(pages):
+        page = doc.new_page(width=2384, height=3370)
+        shape = page.new_shape()
+        for _ in range(400):
+            start = fitz.Point(rng.uniform(0, 2384), rng.uniform(0, 3370))
+            end = fitz.Point(rng.uniform(0, 2384), rng.uniform(0, 3370))
+            shape.draw_line(start, end)
+        shape.finish(color=(0, 0, 0), width=0.5)
+        shape.commit()
+        page.insert_text((100, 100), "Drawing sheet", fontsize=48)
+    doc.save(path)
+    doc.close()
+
+
+# name -> (generator, pages for a full run, pages for --quick)
+CORPUS = {
+    "text_heavy": (make_text_heavy, 20, 3),
+    "scanned": (make_scanned, 10, 2),
+    "many_pages": (make_many_pages, 300, 30),
+    "large_page": (make_large_page, 2, 1),
+}
+
+
+def build_corpus(work_dir, quick=False):
+    """Generate the synthetic PDFs, returning ``{name: (path, pages)}``"""
+    corpus = {}
+    for name, (generator, pages, quick_pages) in CORPUS.items():
+        pages = quick_pages if quick else pages
+        path = os.path.join(work_dir, f"{name}.pdf")
+        # A fixed seed per document keeps the corpus byte-for-byte repeatable
+        generator(path, pages, random.Random(f"{SEED}-{name}"))
+        corpus[name] = (path, pages)
+    return corpus
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process, or None where unsupported"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024**2 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_case(pdf_path, output_path, settings):
+    """Runs in a fresh process so peak RSS belongs to this case alone"""
+    libraries = check_available_libraries()
+    started = time.perf_counter()
+    result = convert_one(pdf_path, output_path, settings, libraries)
+    seconds = time.perf_counter() - started
+    return result, seconds, peak_rss_mb()
+
+
+def run_benchmarks(corpus, work_dir, paths, repeat=1):
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for corpus_name, (pdf_path, pages) in corpus.items():
+        input_mb = os.path.getsize(pdf_path) / 1024**2
+        for path_name in paths:
+            output_format, docx_method, uses_dpi = CONVERSION_PATHS[path_name]
+            quality_settings = [("high", True), ("draft", False)] if uses_dpi else [("fixed", True)]
+            for quality_name, high_quality in quality_settings:
+                settings = ConversionSettings(output_format=output_format, docx_method=docx_method,
+                                              high_quality=high_quality)
+                best = None
+                for attempt in range(repeat):
+                    output_path = os.path.join(
+                        work_dir, "out", f"{corpus_name}-{path_name}-{quality_name}-{attempt}.{output_format}")
+                    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                        result, seconds, rss = executor.submit(run_case, pdf_path, output_path, settings).result()
+                    # Keep the fastest attempt; slower ones are mostly noise
+                    if best is None or seconds < best[1]:
+                        best = (result, seconds, rss, output_path)
+
+                result, seconds, rss, output_path = best
+                dpi = (settings.docx_dpi() if output_format == "docx" else settings.image_dpi()) if uses_dpi else None
+                entry = {
+                    "corpus": corpus_name,
+                    "path": path_name,
+                    "quality": quality_name,
+                    "dpi": dpi,
+                    "pages": pages,
+                    "success": result["success"],
+                    "error": result["error"],
+                    "seconds": round(seconds, 4),
+                    "pages_per_sec": round(pages / seconds, 2) if seconds else None,
+                    "input_mb_per_sec": round(input_mb / seconds, 2) if seconds else None,
+                    "output_bytes": path_bytes(output_path) if result["success"] else 0,
+                    "peak_rss_mb": rss,
+                }
+                results.append(entry)
+                print(f"{corpus_name:>11} {path_name:>17} {quality_name:>5}: "
+                      f"{entry['seconds']:8.3f}s {entry['pages_per_sec'] or 0:8.1f} pages/s "
+                      f"{entry['peak_rss_mb'] or 0:7.1f} MB RSS", file=sys.stderr)
+    return results
+
+
+def compare(results, baseline_path):
+    """Print pages/sec changes against an earlier report"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {(r["corpus"], r["path"], r["quality"]): r for r in json.load(f)["results"]}
+
+    for entry in results:
+        before = baseline.get((entry["corpus"], entry["path"], entry["quality"]))
+        if not before or not before["pages_per_sec"] or not entry["pages_per_sec"]:
+            continue
+        change = (entry["pages_per_sec"] / before["pages_per_sec"] - 1) * 100
+        print(f"{entry['corpus']:>11} {entry['path']:>17} {entry['quality']:>5}: {change:+7.1f}% pages/s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark every conversion path on synthetic PDFs.")
+    parser.add_argument("-o", "--output", help="Write the JSON report here (default: stdout)")
+    parser.add_argument("--work-dir", help="Keep the corpus and outputs here (default: a temp folder)")
+    parser.add_argument("--quick", action="store_true", help="Much smaller corpus for smoke runs")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per case, fastest is kept (default: 1)")
+    parser.add_argument("--paths", default=",".join(CONVERSION_PATHS),
+                        help="Comma-separated conversion paths to run (default: all)")
+    parser.add_argument("--baseline", help="Earlier report to compare pages/sec against")
+    args = parser.parse_args(argv)
+
+    libraries = check_available_libraries()
+    if not libraries['fitz']:
+        print("PyMuPDF is required to generate the benchmark corpus.", file=sys.stderr)
+        return 2
+
+    paths = [path.strip() for path in args.paths.split(",") if path.strip()]
+    unknown = [path for path in paths if path not in CONVERSION_PATHS]
+    if unknown:
+        print(f"Unknown conversion paths: {', '.join(unknown)}", file=sys.stderr)
+        return 2
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        work_dir = args.work_dir or temp_dir
+        os.makedirs(os.path.join(work_dir, "out"), exist_ok=True)
+
+        corpus = build_corpus(work_dir, args.quick)
+        results = run_benchmarks(corpus, work_dir, paths, max(1, args.repeat))
+
+        report = {
+            "engine_version": ENGINE_VERSION,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "libraries": libraries,
+            "quick": args.quick,
+            "corpus": {name: {"pages": pages, "bytes": os.path.getsize(path)}
+                       for name, (path, pages) in corpus.items()},
+            "results": results,
+        }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        compare(results, args.baseline)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
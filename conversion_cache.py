@@ -0,0 +1,198 @@
+"""Persistent conversion cache keyed by input content and conversion settings.
+
+Every entry lives in its own folder::
+
+    <cache_dir>/<key[:2]>/<key>/meta.json
+    <cache_dir>/<key[:2]>/<key>/data          (single output file)
+    <cache_dir>/<key[:2]>/<key>/data/...      (folder of page images)
+
+The modification time of ``meta.json`` doubles as the last-used time that
+eviction works from.
+"""
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+from dataclasses import asdict
+from pathlib import Path
+
+from conversion_metrics import path_bytes
+from fast_copy import copy_file
+
+# Settings that change how fast a conversion runs but not what it produces
+RUNTIME_ONLY_FIELDS = {"page_workers", "page_metrics", "ocr_workers", "encode_threads", "hardlink_copies"}
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def default_cache_dir():
+    return str(Path.home() / ".cache" / "universal_pdf_converter")
+
+
+def hash_file(path):
+    """SHA-256 of a file's content"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def settings_fingerprint(settings, engine_version):
+    """Stable string describing everything that affects the converted output"""
+    fields = {name: value for name, value in asdict(settings).items()
+              if name not in RUNTIME_ONLY_FIELDS}
+    fields["engine_version"] = engine_version
+    return json.dumps(fields, sort_keys=True)
+
+
+def produced_path(output_path):
+    """Where a conversion actually wrote its result.
+
+    Multi-page image exports write a folder named after the output file
+    instead of the file itself.
+    """
+    if os.path.isfile(output_path):
+        return output_path
+    folder = os.path.splitext(output_path)[0]
+    if os.path.isdir(folder):
+        return folder
+    return None
+
+
+def link_or_copy(source, destination):
+    """Hard-link when source and destination share a filesystem, copy otherwise"""
+    copy_file(source, destination, allow_hardlink=True)
+
+
+def same_file(a, b):
+    """True when ``b`` is a link to or an unmodified copy of ``a``"""
+    try:
+        if os.path.samefile(a, b):
+            return True
+        stat_a, stat_b = os.stat(a), os.stat(b)
+    except OSError:
+        return False
+    # copy2 preserves mtime, so size plus mtime identifies an untouched copy
+    return stat_a.st_size == stat_b.st_size and int(stat_a.st_mtime) == int(stat_b.st_mtime)
+
+
+class ConversionCache:
+    def __init__(self, cache_dir=None, max_bytes=10 * 1024**3, max_age_days=30):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.max_age = max_age_days * 86400 if max_age_days else None
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def key_for(self, pdf_path, settings, engine_version):
+        fingerprint = settings_fingerprint(settings, engine_version)
+        return hashlib.sha256(f"{hash_file(pdf_path)}\n{fingerprint}".encode("utf-8")).hexdigest()
+
+    def entry_dir(self, key):
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def lookup(self, key):
+        """Return the cached payload path for ``key`` or None, marking it as used"""
+        entry = self.entry_dir(key)
+        meta_path = os.path.join(entry, "meta.json")
+        data_path = os.path.join(entry, "data")
+        if not (os.path.exists(meta_path) and os.path.exists(data_path)):
+            return None
+        os.utime(meta_path)
+        return data_path
+
+    def is_materialized(self, data_path, output_path):
+        """True when ``output_path`` already holds exactly this cached result"""
+        if os.path.isfile(data_path):
+            return same_file(data_path, output_path)
+
+        folder = os.path.splitext(output_path)[0]
+        if not os.path.isdir(folder):
+            return False
+        names = os.listdir(data_path)
+        if sorted(names) != sorted(os.listdir(folder)):
+            return False
+        return all(same_file(os.path.join(data_path, name), os.path.join(folder, name)) for name in names)
+
+    def materialize(self, data_path, output_path):
+        """Place a cached result at ``output_path`` (or its page folder)"""
+        if os.path.isfile(data_path):
+            link_or_copy(data_path, output_path)
+        else:
+            shutil.copytree(data_path, os.path.splitext(output_path)[0],
+                            copy_function=link_or_copy, dirs_exist_ok=True)
+
+    def store(self, key, output_path):
+        """Add a freshly converted result to the cache"""
+        source = produced_path(output_path)
+        if source is None:
+            return
+
+        entry = self.entry_dir(key)
+        if os.path.exists(entry):
+            return
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+
+        # Build the entry next to its final location and rename it into place,
+        # so a crash never leaves a half-written entry behind
+        staging = tempfile.mkdtemp(prefix=".tmp-", dir=os.path.dirname(entry))
+        try:
+            data_path = os.path.join(staging, "data")
+            if os.path.isdir(source):
+                shutil.copytree(source, data_path, copy_function=link_or_copy)
+            else:
+                link_or_copy(source, data_path)
+
+            meta = {
+                "created": time.time(),
+                "source_name": os.path.basename(output_path),
+                "size": path_bytes(data_path),
+            }
+            with open(os.path.join(staging, "meta.json"), 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+
+            os.rename(staging, entry)
+        except OSError:
+            # Another process stored the same key first
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def entries(self):
+        """Yield ``(entry_dir, last_used, size)`` for every cache entry"""
+        for prefix in os.scandir(self.cache_dir):
+            if not prefix.is_dir():
+                continue
+            for entry in os.scandir(prefix.path):
+                meta_path = os.path.join(entry.path, "meta.json")
+                try:
+                    with open(meta_path, encoding='utf-8') as f:
+                        size = json.load(f).get("size", 0)
+                    yield entry.path, os.path.getmtime(meta_path), size
+                except (OSError, ValueError):
+                    continue
+
+    def evict(self):
+        """Drop entries older than ``max_age`` then least recently used ones over ``max_bytes``.
+
+        Returns the number of entries removed.
+        """
+        now = time.time()
+        removed = 0
+        kept = []
+        for entry, last_used, size in self.entries():
+            if self.max_age and now - last_used > self.max_age:
+                shutil.rmtree(entry, ignore_errors=True)
+                removed += 1
+            else:
+                kept.append((last_used, size, entry))
+
+        total = sum(size for _, size, _ in kept)
+        if self.max_bytes:
+            for last_used, size, entry in sorted(kept):
+                if total <= self.max_bytes:
+                    break
+                shutil.rmtree(entry, ignore_errors=True)
+                total -= size
+                removed += 1
+        return removed
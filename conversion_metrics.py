@@ -0,0 +1,163 @@
+"""Per-file and per-page timing instrumentation for conversions.
+
+``ConversionMetrics`` records one file: time spent per stage (open, render,
+encode, extract, ocr, assemble, save, copy), bytes read and written, page
+count and which library did the work. It travels back from worker processes as
+a plain dict inside each result.
+
+``MetricsAggregator`` sums those dicts across a batch and exports them as a
+Prometheus text-format file and/or a JSON-lines log.
+"""
+import os
+import json
+import time
+from contextlib import contextmanager
+
+STAGES = ["open", "render", "encode", "extract", "ocr", "assemble", "save", "copy"]
+
+
+class ConversionMetrics:
+    def __init__(self, record_pages=True):
+        self.stages = {}
+        self.pages = []
+        self.page_count = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.library = None
+        self.record_pages = record_pages
+
+    @contextmanager
+    def stage(self, name):
+        """Time a block of work and add it to ``name``"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - started)
+
+    def add_time(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def add_page(self, page_num, **stage_seconds):
+        """Record the stage times of one page (they also count toward the file totals)"""
+        for name, seconds in stage_seconds.items():
+            self.add_time(name, seconds)
+        if self.record_pages:
+            self.pages.append({"page": page_num + 1,
+                               **{name: round(seconds, 5) for name, seconds in stage_seconds.items()}})
+
+    def to_dict(self):
+        return {
+            "library": self.library,
+            "pages": self.page_count,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "stages": {name: round(seconds, 5) for name, seconds in self.stages.items()},
+            "per_page": self.pages,
+        }
+
+
+def path_bytes(output_path):
+    """Bytes in a file or folder, or in the folder a multi-page image export wrote"""
+    if os.path.isfile(output_path):
+        return os.path.getsize(output_path)
+    folder = output_path if os.path.isdir(output_path) else os.path.splitext(output_path)[0]
+    if not os.path.isdir(folder):
+        return 0
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(folder) for name in names)
+
+
+class MetricsAggregator:
+    """Running totals over many result dicts, with Prometheus and JSON exports"""
+
+    def __init__(self, prometheus_path=None, json_log_path=None):
+        self.prometheus_path = prometheus_path
+        self.json_log_path = json_log_path
+        self.started = time.time()
+        self.files = {"success": 0, "failed": 0, "cached": 0, "cancelled": 0}
+        self.pages = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.seconds = 0.0
+        self.stages = {}
+        self.libraries = {}
+
+    def add(self, result):
+        """Fold one engine result dict into the totals"""
+        if result.get("cancelled"):
+            self.files["cancelled"] += 1
+        elif result.get("cached"):
+            self.files["cached"] += 1
+        elif result["success"]:
+            self.files["success"] += 1
+        else:
+            self.files["failed"] += 1
+        self.seconds += result.get("seconds", 0.0)
+
+        metrics = result.get("metrics")
+        if metrics:
+            self.pages += metrics["pages"]
+            self.bytes_read += metrics["bytes_read"]
+            self.bytes_written += metrics["bytes_written"]
+            for name, seconds in metrics["stages"].items():
+                self.stages[name] = self.stages.get(name, 0.0) + seconds
+            if metrics["library"]:
+                self.libraries[metrics["library"]] = self.libraries.get(metrics["library"], 0) + 1
+
+        if self.json_log_path:
+            with open(self.json_log_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(result) + "\n")
+
+    def summary(self):
+        elapsed = max(time.time() - self.started, 1e-9)
+        return {
+            "files": dict(self.files),
+            "pages": self.pages,
+            "pages_per_sec": round(self.pages / elapsed, 2),
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "conversion_seconds": round(self.seconds, 3),
+            "elapsed_seconds": round(elapsed, 3),
+            "stages": {name: round(seconds, 3) for name, seconds in self.stages.items()},
+            "libraries": dict(self.libraries),
+        }
+
+    def prometheus_text(self):
+        lines = [
+            "# HELP pdf_converter_files_total Files processed by outcome.",
+            "# TYPE pdf_converter_files_total counter",
+        ]
+        for outcome, count in self.files.items():
+            lines.append(f'pdf_converter_files_total{{outcome="{outcome}"}} {count}')
+        lines += [
+            "# HELP pdf_converter_pages_total Pages converted.",
+            "# TYPE pdf_converter_pages_total counter",
+            f"pdf_converter_pages_total {self.pages}",
+            "# HELP pdf_converter_bytes_read_total Input bytes read.",
+            "# TYPE pdf_converter_bytes_read_total counter",
+            f"pdf_converter_bytes_read_total {self.bytes_read}",
+            "# HELP pdf_converter_bytes_written_total Output bytes written.",
+            "# TYPE pdf_converter_bytes_written_total counter",
+            f"pdf_converter_bytes_written_total {self.bytes_written}",
+            "# HELP pdf_converter_stage_seconds_total Time spent per conversion stage.",
+            "# TYPE pdf_converter_stage_seconds_total counter",
+        ]
+        for name, seconds in sorted(self.stages.items()):
+            lines.append(f'pdf_converter_stage_seconds_total{{stage="{name}"}} {seconds:.6f}')
+        lines += [
+            "# HELP pdf_converter_library_files_total Files handled per library path.",
+            "# TYPE pdf_converter_library_files_total counter",
+        ]
+        for library, count in sorted(self.libraries.items()):
+            lines.append(f'pdf_converter_library_files_total{{library="{library}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self):
+        """Rewrite the textfile-collector file atomically"""
+        if not self.prometheus_path:
+            return
+        temp_path = self.prometheus_path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(self.prometheus_text())
+        os.replace(temp_path, self.prometheus_path)
@@ -0,0 +1,1251 @@
+"""Headless PDF conversion engine.
+
+Holds every conversion path used by the Tk GUI in ``pdftoword.py`` so the same
+code can run on display-less servers. This module must never import tkinter.
+
+Command line usage::
+
+    python converter_engine.py "scans/*.pdf" -f docx --dpi 200 -w 4 -o out/
+"""
+import os
+import sys
+import glob
+import json
+import time
+import shutil
+import signal
+import argparse
+import threading
+import traceback
+import multiprocessing
+from dataclasses import dataclass, replace
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+# stdout carries one JSON result per line; PyMuPDF prints its messages (such as
+# the "fitz API is deprecated" warning on import) to stdout unless told
+# otherwise. Set before anything imports it, and inherited by worker processes.
+os.environ.setdefault("PYMUPDF_MESSAGE", "fd:2")
+
+from conversion_cache import ConversionCache, default_cache_dir
+from conversion_metrics import ConversionMetrics, MetricsAggregator, path_bytes
+from converter_registry import ConverterBackend, backend_for, check_available_libraries, format_variants, \
+    output_formats, register_backend
+from fast_copy import copy_file
+from file_discovery import iter_pdfs, split_patterns
+from docx_builder import block_paragraphs, text_paragraphs
+from docx_stream import DocxVolumes
+from job_journal import JobJournal, read_journal
+from page_ocr import OcrCache, ocr_engine, recognize_pages
+from preflight import preflight_files, route_docx_method
+from page_ranges import select_pages, validate_page_ranges
+from page_renderer import CANCEL_POLL_SECONDS, COLOR_MODES, RenderCache, RenderPolicy, iter_rendered_pages, save_image
+
+ENGINE_VERSION = "1.0"
+
+IMAGE_ENCODINGS = ["png", "jpeg"]
+# Image export format -> RenderPolicy encoding
+EXPORT_ENCODINGS = {"png": "png", "jpg": "jpeg", "webp": "webp"}
+TEXT_MODES = ["text", "blocks", "words"]
+
+# Pages with less extractable text than this are treated as scans in auto DOCX mode
+AUTO_MIN_TEXT_CHARS = 20
+
+# Width of page images in DOCX output (the height follows the page's aspect ratio)
+DOCX_PAGE_WIDTH_INCHES = 7.5
+
+
+def log_to_stderr(message):
+    """Default diagnostics sink - keeps stdout free for machine-readable output"""
+    print(message, file=sys.stderr)
+
+
+@dataclass
+class ConversionSettings:
+    """Everything a conversion needs, detached from any GUI variables"""
+    output_format: str = "docx"
+    docx_method: str = "image_based"
+    high_quality: bool = True
+    dpi: int = None  # Overrides the high_quality switch when set
+    page_workers: int = 1  # Processes sharing the pages of one document
+    image_encoding: str = "png"  # Page images embedded in DOCX: "png" or "jpeg"
+    jpeg_quality: int = 85  # Used for JPEG page images in DOCX and JPG export
+    text_mode: str = "text"  # Text export layout: "text", "blocks" or "words"
+    page_separator: str = None  # Line written before each page; "{page}" is the page number
+    page_metrics: bool = False  # Include per-page stage times in each result's metrics
+    pages: str = None  # Page ranges to convert, e.g. "1-3,10,-1"; None converts every page
+    first_pages: int = None  # Keep only the first N selected pages
+    max_pixels: int = None  # Lower the DPI of pages that would exceed this many pixels
+    max_dimension: int = None  # Lower the DPI of pages whose longest side would exceed this
+    color_mode: str = "rgb"  # Page images in "rgb", "gray" or "mono" (1-bit)
+    ocr: bool = False  # Recognize text on pages without a text layer
+    ocr_language: str = "eng"  # Tesseract language(s), e.g. "eng+deu"
+    ocr_workers: int = 0  # OCR processes per file; 0 = one per CPU, shared among batch workers
+    image_progressive: bool = False  # Progressive JPG export (PNG and WebP are unaffected)
+    encode_threads: int = 0  # Threads encoding rendered pages; 0 = one per CPU, at most 4
+    docx_volume_pages: int = None  # Split DOCX output into volumes of this many pages
+    hardlink_copies: bool = False  # PDF copies may be hard links to their input (same inode)
+
+    def docx_dpi(self):
+        return self.dpi or (300 if self.high_quality else 150)
+
+    def image_dpi(self):
+        return self.dpi or (300 if self.high_quality else 200)
+
+
+class ReservedNames(set):
+    """Output paths handed out in a batch but maybe not written yet.
+
+    Also remembers the next free ``_N`` suffix per name, so the hundredth
+    ``scan.pdf`` of a batch does not probe ``scan_1`` ... ``scan_99`` again.
+    """
+
+    def __init__(self, paths=()):
+        super().__init__(paths)
+        self.next_suffix = {}
+
+
+def unique_output_path(output_dir, file_name, extension, reserved=None):
+    """Return a free output path, adding _1, _2 ... suffixes on collision.
+
+    ``reserved`` is an optional set (ideally ``ReservedNames``) of paths
+    already handed out in this batch but not written yet; the returned path
+    is added to it.
+    """
+    reserved = reserved if reserved is not None else set()
+    base_path = os.path.join(output_dir, f"{file_name}.{extension}")
+    next_suffix = getattr(reserved, "next_suffix", {})
+
+    counter = next_suffix.get(base_path, 0)
+    output_path = os.path.join(output_dir, f"{file_name}_{counter}.{extension}") if counter else base_path
+    # The set lookup is free; only names not handed out yet cost a stat call
+    while output_path in reserved or os.path.exists(output_path):
+        counter += 1
+        output_path = os.path.join(output_dir, f"{file_name}_{counter}.{extension}")
+
+    next_suffix[base_path] = counter + 1
+    reserved.add(output_path)
+    return output_path
+
+
+class ConversionCancelled(BaseException):
+    """Raised between pages once a batch has been asked to stop.
+
+    A BaseException so the per-format ``except Exception`` handlers let it
+    through instead of reporting an ordinary conversion failure.
+    """
+
+
+# Cancel flag of a pool worker process, installed by ``install_cancel_event``
+_worker_cancel_event = None
+
+
+def install_cancel_event(event):
+    """Process pool initializer: share the batch's cancel flag with this worker"""
+    global _worker_cancel_event
+    _worker_cancel_event = event
+    # Ctrl+C reaches the whole process group; only the parent decides to stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def partial_path(output_path):
+    """Hidden temporary name a conversion writes to before it is published"""
+    folder, name = os.path.split(output_path)
+    base_name, extension = os.path.splitext(name)
+    return os.path.join(folder, f".{base_name}.part{os.getpid()}{extension}")
+
+
+def publish_output(temp_path, output_path):
+    """Move a finished output (file or folder of pages) into place with a rename"""
+    if os.path.isfile(temp_path):
+        os.replace(temp_path, output_path)
+        return
+    temp_folder, folder = os.path.splitext(temp_path)[0], os.path.splitext(output_path)[0]
+    if not os.path.isdir(temp_folder):
+        return
+    if os.path.isdir(folder):
+        # Reconversion: swap the old page folder out before dropping it
+        old_folder = temp_folder + ".old"
+        os.replace(folder, old_folder)
+        os.replace(temp_folder, folder)
+        shutil.rmtree(old_folder, ignore_errors=True)
+    else:
+        os.replace(temp_folder, folder)
+
+
+def discard_output(temp_path):
+    if os.path.isfile(temp_path):
+        os.remove(temp_path)
+    shutil.rmtree(os.path.splitext(temp_path)[0], ignore_errors=True)
+
+
+def pdfinfo_page_size(info):
+    """``(width, height)`` in points from pdfinfo's "612 x 792 pts (letter)", or None"""
+    try:
+        width, _, height = info["Page size"].split()[:3]
+        return float(width), float(height)
+    except (KeyError, ValueError):
+        return None
+
+
+class ConversionEngine:
+    def __init__(self, settings=None, libraries=None, log=log_to_stderr, cancel_event=None, render_cache=None):
+        self.settings = settings or ConversionSettings()
+        # Pages rendered for other outputs of the same file (see ``convert_formats``)
+        self.render_cache = render_cache
+        self.cancel_event = cancel_event if cancel_event is not None else _worker_cancel_event
+        self.libraries = libraries if libraries is not None else check_available_libraries()
+        self.log = log
+        # Non-fatal notes about the file being converted (e.g. scanned pages)
+        self.warnings = []
+        self.metrics = ConversionMetrics()
+
+    def backend(self):
+        return backend_for(self.settings.output_format, self.settings.docx_method)
+
+    def missing_libraries(self):
+        """Return a message naming the libraries the current format needs, or None"""
+        backend = self.backend()
+        if backend is None:
+            return f"No converter is registered for {self.settings.output_format}."
+        if not backend.is_available(self.libraries):
+            return backend.requirement_message()
+        return None
+
+    def check_cancelled(self):
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise ConversionCancelled()
+
+    def convert(self, pdf_path, output_path):
+        """Convert one file using the configured output format.
+
+        The output is written under a hidden temporary name and renamed into
+        place once complete, so a crash or cancellation never leaves a
+        partial file behind.
+        """
+        self.warnings = []
+        self.metrics = ConversionMetrics(record_pages=self.settings.page_metrics)
+        self.check_cancelled()
+
+        temp_path = partial_path(output_path)
+        try:
+            success = self.dispatch(pdf_path, temp_path)
+            # Stopped page workers hand back partial work; never publish it
+            self.check_cancelled()
+            if success:
+                with self.metrics.stage("save"):
+                    publish_output(temp_path, output_path)
+        finally:
+            discard_output(temp_path)
+
+        try:
+            self.metrics.bytes_read = os.path.getsize(pdf_path)
+            if success:
+                self.metrics.bytes_written = path_bytes(output_path)
+        except OSError:
+            pass
+        return success
+
+    def selected_pages(self, page_count):
+        """0-based pages picked by the ``pages``/``first_pages`` settings"""
+        pages = select_pages(page_count, self.settings.pages, self.settings.first_pages)
+        self.metrics.page_count = len(pages)
+        if not pages:
+            self.warnings.append(f"No pages selected - the document has {page_count}")
+        return pages
+
+    def render_policy(self, dpi, encoding):
+        return RenderPolicy(dpi=dpi, max_pixels=self.settings.max_pixels,
+                            max_dimension=self.settings.max_dimension, color_mode=self.settings.color_mode,
+                            encoding=encoding, jpeg_quality=self.settings.jpeg_quality,
+                            progressive=self.settings.image_progressive)
+
+    def rendered_pages(self, pdf_path, page_numbers, policy):
+        """``iter_rendered_pages`` with this conversion's worker settings and metrics"""
+        encode_threads = self.settings.encode_threads or min(4, os.cpu_count() or 1)
+        return iter_rendered_pages(pdf_path, page_numbers, policy, self.settings.page_workers,
+                                   self.metrics, encode_threads, self.render_cache, self.cancel_event)
+
+    def dispatch(self, pdf_path, output_path):
+        backend = self.backend()
+        if backend is None:
+            self.log(f"No converter is registered for {self.settings.output_format}")
+            return False
+        return getattr(self, backend.method)(pdf_path, output_path)
+
+    def docx_volumes(self, output_path, page_count, on_volume=None):
+        return DocxVolumes(output_path, page_count, self.settings.docx_volume_pages, on_volume)
+
+    def convert_to_docx_image_based(self, pdf_path, output_path):
+        """Convert PDF to Word by embedding pages as images - BEST FOR SCANNED PDFs"""
+        try:
+            if not self.libraries['fitz'] or not self.libraries['python_docx']:
+                return False
+
+            import fitz
+
+            self.log(f"Using image-based conversion for {pdf_path}")
+            self.metrics.library = "fitz+python-docx"
+
+            with self.metrics.stage("open"):
+                pdf_document = fitz.open(pdf_path)
+                page_count = len(pdf_document)
+                pdf_document.close()
+            page_numbers = self.selected_pages(page_count)
+            if not page_numbers:
+                return False
+
+            policy = self.render_policy(self.settings.docx_dpi(), self.settings.image_encoding)
+            recognized = self.ocr_texts(pdf_path, page_numbers)
+
+            # Pages come back in order even when rendered by several workers,
+            # and each one is written into the DOCX package as soon as it arrives
+            pages = self.rendered_pages(pdf_path, page_numbers, policy)
+            with self.docx_volumes(output_path, len(page_numbers)) as volumes:
+                for page_num, image_bytes in pages:
+                    self.check_cancelled()
+                    with self.metrics.stage("assemble"):
+                        writer, first_in_volume = volumes.page()
+                        if not first_in_volume:
+                            writer.add_page_break()
+                        writer.add_picture(image_bytes, DOCX_PAGE_WIDTH_INCHES)
+                        # Searchable text for scanned pages goes right below the image
+                        if page_num in recognized:
+                            writer.add_paragraphs(text_paragraphs(recognized[page_num]))
+                with self.metrics.stage("save"):
+                    volumes.close()
+            self.log("Image-based DOCX conversion successful!")
+            return True
+
+        except Exception as e:
+            self.log(f"Image-based conversion failed: {e}")
+            self.log(traceback.format_exc())
+            return False
+
+    def convert_to_docx_text_based(self, pdf_path, output_path):
+        """Convert PDF to Word with text extraction - FOR TEXT-BASED PDFs"""
+        try:
+            if not self.libraries['fitz'] or not self.libraries['python_docx']:
+                return False
+
+            import fitz
+
+            self.metrics.library = "fitz+python-docx"
+            with self.metrics.stage("open"):
+                pdf_document = fitz.open(pdf_path)
+            try:
+                page_numbers = self.selected_pages(len(pdf_document))
+                if not page_numbers:
+                    return False
+                recognized = self.ocr_texts(pdf_path, page_numbers)
+
+                def add_title(writer):
+                    writer.add_paragraph(os.path.basename(pdf_path), "Title")
+
+                with self.docx_volumes(output_path, len(page_numbers), add_title) as volumes:
+                    # Extract text from each page
+                    for page_num in page_numbers:
+                        self.check_cancelled()
+                        started = time.perf_counter()
+                        page = pdf_document.load_page(page_num)
+                        if page_num in recognized:
+                            paragraphs = text_paragraphs(recognized[page_num])
+                        else:
+                            paragraphs = block_paragraphs(page)
+                        extracted = time.perf_counter()
+
+                        if paragraphs:
+                            writer, first_in_volume = volumes.page()
+                            if not first_in_volume:
+                                writer.add_page_break()
+                            writer.add_paragraph(f"Page {page_num + 1}", "Heading1")
+                            writer.add_paragraphs(paragraphs)
+                        else:
+                            # If no text found, this might be a scanned PDF
+                            self.warnings.append(f"Page {page_num + 1} appears to be scanned - no text found")
+                        self.metrics.add_page(page_num, extract=extracted - started,
+                                              assemble=time.perf_counter() - extracted)
+
+                    with self.metrics.stage("save"):
+                        volumes.close()
+            finally:
+                pdf_document.close()
+            self.log("Text-based DOCX conversion successful!")
+            return True
+
+        except Exception as e:
+            self.log(f"Text-based conversion failed: {e}")
+            return False
+
+    def ocr_texts(self, pdf_path, page_numbers, min_text_chars=1):
+        """OCR text of the pages without a text layer, when OCR is enabled"""
+        if not self.settings.ocr or not page_numbers:
+            return {}
+        engine = ocr_engine(self.libraries)
+        if engine is None:
+            self.warnings.append("OCR skipped - Tesseract with PyMuPDF OCR support or pytesseract is required")
+            return {}
+
+        texts, cached = recognize_pages(pdf_path, page_numbers, engine, self.settings.ocr_language,
+                                        self.settings.ocr_workers or default_workers(), min_text_chars,
+                                        OcrCache(), self.metrics, self.cancel_event)
+        if texts:
+            self.warnings.append(f"OCR recognized {len(texts)} pages ({cached} from cache)")
+        return texts
+
+    def convert_to_docx_auto(self, pdf_path, output_path):
+        """Convert PDF to Word page by page: text where there is a text layer, images elsewhere"""
+        try:
+            if not self.libraries['fitz'] or not self.libraries['python_docx']:
+                return False
+
+            import fitz
+
+            self.metrics.library = "fitz+python-docx"
+            with self.metrics.stage("open"):
+                pdf_document = fitz.open(pdf_path)
+            try:
+                page_numbers = self.selected_pages(len(pdf_document))
+                if not page_numbers:
+                    return False
+
+                # Extracting the text layer is cheap next to rendering, so it
+                # decides which pages need a pixmap at all
+                texts = {}
+                for page_num in page_numbers:
+                    self.check_cancelled()
+                    started = time.perf_counter()
+                    paragraphs = block_paragraphs(pdf_document.load_page(page_num))
+                    if sum(len(paragraph) for paragraph in paragraphs) >= AUTO_MIN_TEXT_CHARS:
+                        texts[page_num] = paragraphs
+                    self.metrics.add_time("extract", time.perf_counter() - started)
+            finally:
+                pdf_document.close()
+
+            raster_pages = [page_num for page_num in page_numbers if page_num not in texts]
+            if raster_pages:
+                self.warnings.append(f"Rendered {len(raster_pages)} of {len(page_numbers)} pages as images")
+            recognized = self.ocr_texts(pdf_path, raster_pages, AUTO_MIN_TEXT_CHARS)
+            policy = self.render_policy(self.settings.docx_dpi(), self.settings.image_encoding)
+            rendered = self.rendered_pages(pdf_path, raster_pages, policy)
+
+            with self.docx_volumes(output_path, len(page_numbers)) as volumes:
+                for page_num in page_numbers:
+                    self.check_cancelled()
+                    writer, first_in_volume = volumes.page()
+                    if not first_in_volume:
+                        writer.add_page_break()
+                    if page_num in texts:
+                        with self.metrics.stage("assemble"):
+                            writer.add_paragraphs(texts.pop(page_num))
+                    else:
+                        # Pages come back in the same order they are asked for
+                        _, image_bytes = next(rendered)
+                        with self.metrics.stage("assemble"):
+                            writer.add_picture(image_bytes, DOCX_PAGE_WIDTH_INCHES)
+                            if page_num in recognized:
+                                writer.add_paragraphs(text_paragraphs(recognized[page_num]))
+
+                with self.metrics.stage("save"):
+                    volumes.close()
+            return True
+
+        except Exception as e:
+            self.log(f"Auto DOCX conversion failed: {e}")
+            self.log(traceback.format_exc())
+            return False
+
+    def convert_to_image(self, pdf_path, output_path):
+        """Convert PDF to images, one page at a time so memory stays flat"""
+        try:
+            format = self.settings.output_format
+            policy = self.render_policy(self.settings.image_dpi(), EXPORT_ENCODINGS[format])
+
+            if self.libraries['fitz']:
+                import fitz
+                self.metrics.library = "fitz"
+                with self.metrics.stage("open"):
+                    pdf_document = fitz.open(pdf_path)
+                    page_count = len(pdf_document)
+                    pdf_document.close()
+                page_numbers = self.selected_pages(page_count)
+                if not page_numbers:
+                    return False
+
+                # Only a bounded window of encoded pages is alive at any time
+                pages = self.rendered_pages(pdf_path, page_numbers, policy)
+                for page_num, image_bytes in pages:
+                    self.check_cancelled()
+                    with self.metrics.stage("save"):
+                        with open(self.image_page_path(output_path, format, page_num, len(page_numbers)), 'wb') as f:
+                            f.write(image_bytes)
+                return True
+
+            # Fallback to pdf2image, asking poppler for a single page per call
+            from pdf2image import convert_from_path, pdfinfo_from_path
+            self.metrics.library = "pdf2image"
+            with self.metrics.stage("open"):
+                info = pdfinfo_from_path(pdf_path)
+            page_numbers = self.selected_pages(info["Pages"])
+            if not page_numbers:
+                return False
+
+            # pdfinfo only reports the first page's size; it sizes every page
+            page_size = pdfinfo_page_size(info)
+            dpi = policy.page_dpi(*page_size) if page_size else policy.dpi
+            for page_num in page_numbers:
+                self.check_cancelled()
+                started = time.perf_counter()
+                # Uncompressed PPM is the cheapest way out of pdftoppm; encoding happens once, below
+                image = convert_from_path(pdf_path, dpi=dpi, first_page=page_num + 1, last_page=page_num + 1,
+                                          grayscale=policy.color_mode != "rgb")[0]
+                rendered = time.perf_counter()
+                save_image(image, self.image_page_path(output_path, format, page_num, len(page_numbers)),
+                           round(dpi), policy)
+                image.close()
+                self.metrics.add_page(page_num, render=rendered - started,
+                                      encode=time.perf_counter() - rendered)
+
+            return True
+        except Exception as e:
+            self.log(f"Image conversion error: {e}")
+            self.log(traceback.format_exc())
+            return False
+
+    def image_page_path(self, output_path, format, page_num, page_count):
+        """Single pages use ``output_path``; multi-page files get a folder of pages"""
+        if page_count == 1:
+            return output_path
+
+        # Multiple pages - create directory
+        base_name = os.path.splitext(output_path)[0]
+        os.makedirs(base_name, exist_ok=True)
+        return os.path.join(base_name, f"page_{page_num+1}.{format}")
+
+    def convert_to_text(self, pdf_path, output_path):
+        """Convert PDF to text, writing each page as soon as it is extracted"""
+        try:
+            separator = self.settings.page_separator
+            if self.libraries['fitz']:
+                import fitz
+                self.metrics.library = "fitz"
+                with self.metrics.stage("open"):
+                    doc = fitz.open(pdf_path)
+                try:
+                    page_numbers = self.selected_pages(len(doc))
+                    if not page_numbers:
+                        return False
+                    # Word boxes have no OCR equivalent here, so that mode is left as is
+                    recognized = self.ocr_texts(pdf_path, page_numbers) if self.settings.text_mode != "words" else {}
+                    with open(output_path, 'w', encoding='utf-8') as f:
+                        for page_num in page_numbers:
+                            self.check_cancelled()
+                            started = time.perf_counter()
+                            page = doc.load_page(page_num)
+                            text = recognized.get(page_num) or self.page_text(page)
+                            extracted = time.perf_counter()
+                            if separator is not None:
+                                f.write(separator.format(page=page_num + 1) + "\n")
+                            f.write(text)
+                            self.metrics.add_page(page_num, extract=extracted - started,
+                                                  save=time.perf_counter() - extracted)
+                finally:
+                    doc.close()
+                return True
+            elif self.libraries['pypdf']:
+                # Fallback to PyPDF2 (plain text only)
+                import PyPDF2
+                if self.settings.text_mode != "text":
+                    self.warnings.append(f"PyPDF2 fallback ignores text mode '{self.settings.text_mode}'")
+                self.metrics.library = "pypdf"
+                with open(pdf_path, 'rb') as file, open(output_path, 'w', encoding='utf-8') as f:
+                    with self.metrics.stage("open"):
+                        reader = PyPDF2.PdfReader(file)
+                    page_numbers = self.selected_pages(len(reader.pages))
+                    for page_num in page_numbers:
+                        self.check_cancelled()
+                        started = time.perf_counter()
+                        text = reader.pages[page_num].extract_text()
+                        extracted = time.perf_counter()
+                        if separator is not None:
+                            f.write(separator.format(page=page_num + 1) + "\n")
+                        f.write(text + "\n")
+                        self.metrics.add_page(page_num, extract=extracted - started,
+                                              save=time.perf_counter() - extracted)
+                return bool(page_numbers)
+            else:
+                return False
+        except Exception as e:
+            self.log(f"Text conversion error: {e}")
+            self.log(traceback.format_exc())
+            return False
+
+    def page_text(self, page):
+        """Text of one PyMuPDF page in the configured ``text_mode``"""
+        mode = self.settings.text_mode
+        if mode == "blocks":
+            # One paragraph-like block per chunk, images skipped
+            blocks = page.get_text("blocks")
+            return "".join(block[4].rstrip("\n") + "\n\n" for block in blocks if block[6] == 0)
+        if mode == "words":
+            # Tab-separated word boxes: x0, y0, x1, y1, word
+            words = page.get_text("words")
+            return "".join(f"{w[0]:.1f}\t{w[1]:.1f}\t{w[2]:.1f}\t{w[3]:.1f}\t{w[4]}\n" for w in words)
+        return page.get_text()
+
+    def copy_pdf(self, pdf_path, output_path):
+        """Copy PDF file (useful for batch processing)"""
+        try:
+            if self.settings.pages or self.settings.first_pages:
+                return self.extract_pdf_pages(pdf_path, output_path)
+
+            with self.metrics.stage("copy"):
+                # Records which strategy worked: reflink, hardlink, copy_file_range ...
+                self.metrics.library = copy_file(pdf_path, output_path, self.settings.hardlink_copies)
+            return True
+        except Exception as e:
+            self.log(f"PDF copy error: {e}")
+            return False
+
+    def extract_pdf_pages(self, pdf_path, output_path):
+        """Write a PDF holding only the selected pages"""
+        if self.libraries['fitz']:
+            import fitz
+            self.metrics.library = "fitz"
+            with self.metrics.stage("open"):
+                source = fitz.open(pdf_path)
+            try:
+                page_numbers = self.selected_pages(len(source))
+                if not page_numbers:
+                    return False
+                with self.metrics.stage("assemble"):
+                    source.select(page_numbers)
+                with self.metrics.stage("save"):
+                    source.save(output_path, garbage=3, deflate=True)
+            finally:
+                source.close()
+            return True
+
+        if self.libraries['pypdf']:
+            import PyPDF2
+            self.metrics.library = "pypdf"
+            with self.metrics.stage("open"):
+                reader = PyPDF2.PdfReader(pdf_path)
+            page_numbers = self.selected_pages(len(reader.pages))
+            if not page_numbers:
+                return False
+            writer = PyPDF2.PdfWriter()
+            with self.metrics.stage("assemble"):
+                for page_num in page_numbers:
+                    writer.add_page(reader.pages[page_num])
+            with self.metrics.stage("save"):
+                with open(output_path, 'wb') as f:
+                    writer.write(f)
+            return True
+
+        self.log("PyMuPDF or PyPDF2 is required to extract pages from a PDF")
+        return False
+
+
+register_backend(ConverterBackend(
+    "docx", "convert_to_docx_image_based", label="Word Document (.docx)", description="DOCX conversion",
+    requires=[("fitz", "python_docx")], variant="image_based", uses_dpi=True))
+register_backend(ConverterBackend(
+    "docx", "convert_to_docx_text_based", label="Word Document (.docx)", description="DOCX conversion",
+    requires=[("fitz", "python_docx")], variant="text_based"))
+register_backend(ConverterBackend(
+    "docx", "convert_to_docx_auto", label="Word Document (.docx)", description="DOCX conversion",
+    requires=[("fitz", "python_docx")], variant="auto", uses_dpi=True))
+register_backend(ConverterBackend(
+    "png", "convert_to_image", label="Images (PNG)", description="image conversion",
+    requires=[("fitz",), ("pdf2image",)], uses_dpi=True, page_folder=True))
+register_backend(ConverterBackend(
+    "jpg", "convert_to_image", label="Images (JPG)", description="image conversion",
+    requires=[("fitz",), ("pdf2image",)], uses_dpi=True, page_folder=True))
+register_backend(ConverterBackend(
+    "webp", "convert_to_image", label="Images (WebP)", description="WebP conversion",
+    requires=[("fitz", "pil"), ("pdf2image",)], uses_dpi=True, page_folder=True))
+register_backend(ConverterBackend(
+    "txt", "convert_to_text", label="Text File (.txt)", description="text conversion",
+    requires=[("fitz",), ("pypdf",)]))
+register_backend(ConverterBackend("pdf", "copy_pdf", label="PDF (Copy)", description="PDF copies",
+                                  io_bound=True))
+
+OUTPUT_FORMATS = output_formats()
+DOCX_METHODS = format_variants("docx")
+
+
+def base_result(file_path, output_path, settings, error=None):
+    """Skeleton result dict reported for every input file"""
+    return {
+        "input": file_path,
+        "output": output_path,
+        "format": settings.output_format,
+        "success": False,
+        "error": error,
+        "warnings": [],
+        "seconds": 0.0,
+        "cached": False,
+        "cancelled": False,
+        "metrics": None,
+    }
+
+
+def convert_one(file_path, output_path, settings, libraries=None, cancel_event=None, render_cache=None):
+    """Convert a single file and describe the outcome as a plain dict.
+
+    Module-level so it can be shipped to worker processes.
+    """
+    engine = ConversionEngine(settings, libraries, cancel_event=cancel_event, render_cache=render_cache)
+    started = time.perf_counter()
+    result = base_result(file_path, output_path, settings)
+    try:
+        result["success"] = bool(engine.convert(file_path, output_path))
+        if not result["success"]:
+            result["error"] = "Conversion failed"
+    except ConversionCancelled:
+        result["error"] = "Cancelled"
+        result["cancelled"] = True
+    except Exception as e:
+        result["error"] = str(e)
+        engine.log(f"Conversion error details: {traceback.format_exc()}")
+    result["warnings"] = engine.warnings
+    result["metrics"] = engine.metrics.to_dict()
+    result["seconds"] = round(time.perf_counter() - started, 4)
+    return result
+
+
+def convert_formats(file_path, targets, libraries=None, cancel_event=None):
+    """Convert one file to several ``[(settings, output_path), ...]`` targets.
+
+    The targets share a ``RenderCache``, so a page needed at the same DPI by
+    e.g. an image-based DOCX and a PNG export is rasterized only once. Returns
+    one result dict per target; module-level so it can run in worker processes.
+    """
+    if len(targets) == 1:
+        settings, output_path = targets[0]
+        return [convert_one(file_path, output_path, settings, libraries, cancel_event)]
+    render_cache = RenderCache()
+    try:
+        return [convert_one(file_path, output_path, settings, libraries, cancel_event, render_cache)
+                for settings, output_path in targets]
+    finally:
+        render_cache.close()
+
+
+def writes_folder(settings):
+    """True when a multi-page input can produce a folder (image pages, DOCX volumes)"""
+    if settings.output_format == "docx" and settings.docx_volume_pages:
+        return True
+    backend = backend_for(settings.output_format, settings.docx_method)
+    return bool(backend and backend.page_folder)
+
+
+def default_workers():
+    """Worker count that keeps every core busy"""
+    return os.cpu_count() or 1
+
+
+def reuse_cached(cache, key, file_path, output_dir, settings, reserved):
+    """Serve ``file_path`` from the cache, returning its result dict or None on a miss.
+
+    When the plain output name already holds this exact result (a previous run
+    of the same job) nothing is written at all; otherwise the cached output is
+    linked or copied to a fresh name.
+    """
+    data_path = cache.lookup(key)
+    if data_path is None:
+        return None
+
+    file_name = os.path.splitext(os.path.basename(file_path))[0]
+    output_path = os.path.join(output_dir, f"{file_name}.{settings.output_format}")
+    if output_path not in reserved and cache.is_materialized(data_path, output_path):
+        reserved.add(output_path)
+    else:
+        output_path = unique_output_path(output_dir, file_name, settings.output_format, reserved)
+        cache.materialize(data_path, output_path)
+
+    result = base_result(file_path, output_path, settings)
+    result["success"] = True
+    result["cached"] = True
+    return result
+
+
+def run_batch(files, output_dir, settings, workers=1, on_result=None, cache=None, on_discovered=None,
+              cancel_event=None, journal=None, preflight=False, route=False):
+    """Convert ``files`` into ``output_dir`` and yield one result dict per output.
+
+    ``settings`` is one ``ConversionSettings`` or a list of them, one per
+    output format; all formats of a file are converted together by
+    ``convert_formats`` so they share rendered pages. When several of them
+    write page folders, each goes to a subfolder named after its format.
+
+    ``files`` may be a lazy iterable of paths or of ``(path, relative_folder)``
+    pairs; the latter mirror the source layout below ``output_dir``. Inputs are
+    consumed as they arrive and ``on_discovered`` is called with the running
+    total, so progress can start before discovery has finished.
+
+    With ``workers`` > 1 files are spread over a process pool (a thread pool
+    for plain PDF copies) and results are yielded in completion order, not
+    input order. Output names are assigned here, in one process, so workers
+    never race on the ``_1``/``_2`` duplicate suffixes. With a
+    ``ConversionCache`` unchanged inputs skip conversion.
+
+    Setting ``cancel_event`` stops the batch: no further files are started and
+    running conversions stop at their next page, reporting a cancelled result.
+    A ``JobJournal`` records every finished output; outputs it already lists
+    as converted are skipped and reported with ``"resumed": True``.
+
+    With ``preflight`` every input is scanned up front (see ``preflight.py``):
+    files that cannot be converted are rejected without being opened by a
+    converter, the rest run largest first and each result carries its report.
+    ``route`` also picks the DOCX method per file from the report. Both give
+    up lazy discovery, since sorting needs every input.
+    """
+    settings_list = list(settings) if isinstance(settings, (list, tuple)) else [settings]
+    if workers > 1:
+        # Files already run in parallel; default-sized OCR pools split the CPUs
+        # between them instead of each starting one process per CPU
+        ocr_share = max(1, default_workers() // workers)
+        settings_list = [item if item.ocr_workers else replace(item, ocr_workers=ocr_share)
+                         for item in settings_list]
+    backends = [backend_for(item.output_format, item.docx_method) for item in settings_list]
+    # Page folders are named after the file alone, so several image formats
+    # of one file would share a folder - each gets a subfolder of its own
+    folder_formats = [writes_folder(item) for item in settings_list]
+    split_folders = sum(folder_formats) > 1
+    os.makedirs(output_dir, exist_ok=True)
+    libraries = check_available_libraries()
+    # Outputs of a resumed job keep their names; nothing else may take them
+    reserved = ReservedNames(record["output"] for record in journal.completed.values()
+                             if record["output"]) if journal else ReservedNames()
+
+    def cancelled():
+        return cancel_event is not None and cancel_event.is_set()
+
+    reports = {}
+    if preflight or route:
+        scanned = preflight_files(files, libraries, cancel_event)
+        reports = {report.path: report for _, report in scanned}
+        files = [item for item, _ in scanned]
+
+    def plan_target(file_path, target_dir, target_settings):
+        """Return ``(target, None)`` for work to do or ``(None, result)`` when already done"""
+        previous_output = (journal.finished_output(file_path, target_settings.output_format)
+                           if journal else None)
+        if previous_output:
+            result = base_result(file_path, previous_output, target_settings)
+            result["success"] = True
+            result["resumed"] = True
+            return None, result
+
+        key = None
+        if cache:
+            try:
+                key = cache.key_for(file_path, target_settings, ENGINE_VERSION)
+                result = reuse_cached(cache, key, file_path, target_dir, target_settings, reserved)
+                if result:
+                    return None, result
+            except OSError as e:
+                # Unreadable input or cache trouble - let the conversion report it
+                log_to_stderr(f"Cache lookup failed for {file_path}: {e}")
+                key = None
+
+        file_name = os.path.splitext(os.path.basename(file_path))[0]
+        output_path = unique_output_path(target_dir, file_name, target_settings.output_format, reserved)
+        return (target_settings, output_path, key), None
+
+    def plan(item):
+        """Return ``(job, done_results)``; ``job`` is None when every output was already done"""
+        file_path, relative_folder = item if isinstance(item, tuple) else (item, "")
+        target_dir = os.path.join(output_dir, relative_folder) if relative_folder else output_dir
+        os.makedirs(target_dir, exist_ok=True)
+
+        report = reports.get(file_path)
+        if report and report.problem:
+            rejected = []
+            for target_settings in settings_list:
+                result = base_result(file_path, None, target_settings, f"Rejected: {report.problem}")
+                result["rejected"] = True
+                rejected.append(result)
+            return None, rejected
+
+        targets, done = [], []
+        for target_settings, folder_format in zip(settings_list, folder_formats):
+            if route and report and target_settings.output_format == "docx":
+                target_settings = replace(target_settings,
+                                          docx_method=route_docx_method(report) or target_settings.docx_method)
+            format_dir = target_dir
+            if split_folders and folder_format:
+                format_dir = os.path.join(target_dir, target_settings.output_format)
+                os.makedirs(format_dir, exist_ok=True)
+            target, result = plan_target(file_path, format_dir, target_settings)
+            if target:
+                targets.append(target)
+            else:
+                done.append(result)
+        return ((file_path, targets) if targets else None), done
+
+    def finish(result, key):
+        if result["input"] in reports:
+            result["preflight"] = reports[result["input"]].to_dict()
+        if cache and key and result["success"]:
+            cache.store(key, result["output"])
+        if journal and not result["cancelled"] and not result.get("resumed"):
+            journal.record(result)
+        if on_result:
+            on_result(result)
+        return result
+
+    def discover():
+        for count, item in enumerate(files, 1):
+            # Checked between files; running conversions check between pages
+            if cancelled():
+                return
+            if on_discovered:
+                on_discovered(count)
+            yield plan(item)
+
+    def conversion_args(job):
+        file_path, targets = job
+        return file_path, [(target_settings, output_path) for target_settings, output_path, _ in targets]
+
+    if workers <= 1:
+        for job, done in discover():
+            for result in done:
+                yield finish(result, None)
+            if job:
+                results = convert_formats(*conversion_args(job), libraries, cancel_event)
+                for result, (_, _, key) in zip(results, job[1]):
+                    yield finish(result, key)
+    else:
+        if all(backend and backend.io_bound and not (item.pages or item.first_pages)
+               for backend, item in zip(backends, settings_list)):
+            # Plain copies wait on the filesystem, not the CPU: threads skip the
+            # process start-up and share the batch's cancel flag directly
+            worker_cancel = None
+            executor = ThreadPoolExecutor(max_workers=workers)
+            job_args = (libraries, cancel_event)
+        else:
+            # Spawn rather than fork: the GUI process has Tk and worker threads alive
+            context = multiprocessing.get_context("spawn")
+            # Thread events cannot cross processes, so workers get their own flag
+            worker_cancel = context.Event()
+            executor = ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                           initializer=install_cancel_event, initargs=(worker_cancel,))
+            job_args = (libraries,)
+
+        with executor:
+            running = {}
+
+            def collect(block):
+                """Yield finished jobs, waiting for at least one when ``block`` is set"""
+                while True:
+                    if cancelled() and worker_cancel is not None:
+                        worker_cancel.set()
+                    # Wake up regularly so a cancel request reaches the workers quickly
+                    done, _ = wait(running, timeout=CANCEL_POLL_SECONDS if block else 0,
+                                   return_when=FIRST_COMPLETED)
+                    if done or not block:
+                        break
+                for future in done:
+                    file_path, targets = running.pop(future)
+                    try:
+                        results = future.result()
+                    except Exception as e:
+                        # A worker died (e.g. a native crash inside PyMuPDF)
+                        results = [base_result(file_path, output_path, target_settings, f"Worker failed: {e}")
+                                   for target_settings, output_path, _ in targets]
+                    for result, (_, _, key) in zip(results, targets):
+                        yield finish(result, key)
+
+            for job, done in discover():
+                for result in done:
+                    yield finish(result, None)
+                if not job:
+                    continue
+                running[executor.submit(convert_formats, *conversion_args(job), *job_args)] = job
+                # Keep discovery only a little ahead of the workers
+                yield from collect(block=len(running) >= workers * 2)
+
+            while running:
+                yield from collect(block=True)
+
+    if cache:
+        cache.evict()
+
+
+def expand_inputs(patterns, recursive=False, include=None, exclude=None):
+    """Lazily expand CLI arguments that may be files, folders or glob patterns.
+
+    Yields ``(path, relative_folder)``; files found inside a folder argument
+    keep their subfolder so the output can mirror it.
+    """
+    seen = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            yield from iter_pdfs(pattern, recursive, include, exclude)
+            continue
+
+        if glob.has_magic(pattern):
+            matches = glob.iglob(pattern, recursive=True)
+        else:
+            matches = [pattern]
+        for match in matches:
+            # Overlapping patterns must not convert a file twice
+            if match not in seen:
+                seen.add(match)
+                yield match, ""
+
+
+def page_range_argument(text):
+    try:
+        return validate_page_ranges(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def format_list_argument(text):
+    """``"docx,png"`` -> ``["docx", "png"]``, rejecting unknown formats"""
+    formats = []
+    for name in text.split(","):
+        name = name.strip().lower()
+        if name not in OUTPUT_FORMATS:
+            raise argparse.ArgumentTypeError(f"unknown format {name!r} (choose from {', '.join(OUTPUT_FORMATS)})")
+        if name not in formats:
+            formats.append(name)
+    return formats
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(
+        description="Convert PDF files without the GUI. Prints one JSON line per file.")
+    parser.add_argument("inputs", nargs="*", help="PDF files, folders or glob patterns (the folder with --watch)")
+    parser.add_argument("-f", "--format", type=format_list_argument, default="docx",
+                        help=f"Output format, or several separated by commas to convert each file once "
+                             f"into all of them, e.g. \"docx,png\" ({', '.join(OUTPUT_FORMATS)}; default: docx)")
+    parser.add_argument("-o", "--output", default=os.getcwd(),
+                        help="Output folder (default: current directory)")
+    parser.add_argument("--dpi", type=int, default=None,
+                        help="Render DPI for docx/png/jpg/webp (default: 300, or 150/200 with --draft)")
+    parser.add_argument("--draft", action="store_true",
+                        help="Use the lower default DPI when --dpi is not given")
+    parser.add_argument("--max-megapixels", type=float,
+                        help="Lower the DPI of any page that would exceed this many megapixels")
+    parser.add_argument("--max-dimension", type=int,
+                        help="Lower the DPI of any page whose longest side would exceed this many pixels")
+    parser.add_argument("--color", choices=COLOR_MODES, default="rgb",
+                        help="Page images in color, grayscale or 1-bit black and white (default: rgb)")
+    parser.add_argument("--ocr", action="store_true",
+                        help="Recognize text on pages without a text layer (needs Tesseract)")
+    parser.add_argument("--ocr-language", default="eng", help="Tesseract language(s), e.g. eng+deu (default: eng)")
+    parser.add_argument("--ocr-workers", type=int, default=0,
+                        help="OCR processes per file (default: 0 = the CPUs divided by --workers)")
+    parser.add_argument("--docx-method", choices=DOCX_METHODS, default="image_based")
+    parser.add_argument("--volume-pages", type=int, default=None,
+                        help="docx: start a new file every N pages (volumes go to a folder named after the input)")
+    parser.add_argument("--image-encoding", choices=IMAGE_ENCODINGS, default="png",
+                        help="How image-based DOCX embeds pages (default: png)")
+    parser.add_argument("--jpeg-quality", type=int, default=85,
+                        help="JPEG quality 1-100 for --image-encoding jpeg (default: 85)")
+    parser.add_argument("--progressive", action="store_true",
+                        help="jpg: write progressive JPEGs that display while still loading")
+    parser.add_argument("--encode-threads", type=int, default=0,
+                        help="Threads encoding rendered pages (default: 0 = one per CPU, at most 4)")
+    parser.add_argument("--text-mode", choices=TEXT_MODES, default="text",
+                        help="txt layout: plain text, text blocks, or tab-separated word boxes (default: text)")
+    parser.add_argument("--pages", type=page_range_argument,
+                        help="Only convert these pages, e.g. \"1-3,10,-1\" (negative counts from the end)")
+    parser.add_argument("--first-pages", type=int, help="Only convert the first N (selected) pages")
+    parser.add_argument("--page-separator", default=None,
+                        help="txt: line written before each page, e.g. \"=== Page {page} ===\"")
+    parser.add_argument("--page-workers", type=int, default=1,
+                        help="Processes rendering the pages of one large file (default: 1)")
+    parser.add_argument("--hardlink-copies", action="store_true",
+                        help="pdf: hard-link outputs to their inputs when no reflink is possible "
+                             "(both names then share one file)")
+    parser.add_argument("--cache", action="store_true",
+                        help="Reuse earlier results for unchanged inputs")
+    parser.add_argument("--cache-dir", default=None,
+                        help=f"Cache location, implies --cache (default: {default_cache_dir()})")
+    parser.add_argument("--cache-max-mb", type=int, default=10240,
+                        help="Evict least recently used entries above this size, 0 for no limit (default: 10240)")
+    parser.add_argument("--cache-max-age-days", type=int, default=30,
+                        help="Evict entries unused for this many days, 0 to keep forever (default: 30)")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep running and convert PDFs as they appear in the input folder")
+    parser.add_argument("-r", "--recursive", action="store_true",
+                        help="Include subfolders of folder inputs, mirroring them in the output")
+    parser.add_argument("--include", default="",
+                        help="Comma-separated glob patterns a file must match, e.g. \"invoices/*,*2024*\"")
+    parser.add_argument("--exclude", default="",
+                        help="Comma-separated glob patterns for files and folders to skip")
+    parser.add_argument("--state-file", default=None,
+                        help="With --watch, where finished inputs are recorded (default: in the output folder)")
+    parser.add_argument("--settle-seconds", type=float, default=2.0,
+                        help="With --watch, how long a file must stay unchanged before conversion (default: 2)")
+    parser.add_argument("--metrics-file", default=None,
+                        help="Keep a Prometheus text-format metrics file up to date here")
+    parser.add_argument("--metrics-log", default=None,
+                        help="Append every result with its stage timings to this JSON-lines file")
+    parser.add_argument("--page-metrics", action="store_true",
+                        help="Include per-page stage timings in results")
+    parser.add_argument("--preflight", action="store_true",
+                        help="Scan inputs first: reject unconvertible files and convert the largest first")
+    parser.add_argument("--route", action="store_true",
+                        help="docx: pick text-based, image-based or auto per file from the scan (implies --preflight)")
+    parser.add_argument("--analyze", action="store_true",
+                        help="Only print the pre-flight report of every input as JSON, converting nothing")
+    parser.add_argument("--journal", default=None,
+                        help="Record finished inputs in this new file so an interrupted run can be resumed")
+    parser.add_argument("--resume", metavar="JOURNAL", default=None,
+                        help="Re-run the job recorded in JOURNAL, skipping inputs it already converted")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="Number of worker processes, 0 for one per CPU (default: 1)")
+    return parser
+
+
+def cli_main(argv=None):
+    """Command line entry point - returns a process exit code"""
+    parser = build_arg_parser()
+    argv = sys.argv[1:] if argv is None else list(argv)
+    args = parser.parse_args(argv)
+
+    if args.resume:
+        header, _ = read_journal(args.resume)
+        if not header or not header.get("argv"):
+            log_to_stderr(f"{args.resume} does not describe a resumable job.")
+            return 2
+        journal_path = os.path.abspath(args.resume)
+        # Relative inputs and outputs in the recorded arguments mean what
+        # they meant when the job was started
+        os.chdir(header["cwd"])
+        argv = header["argv"]
+        args = parser.parse_args(argv)
+        args.journal = journal_path
+        args.resume = journal_path
+    elif not args.inputs:
+        parser.error("at least one input is required")
+
+    settings = ConversionSettings(
+        output_format=args.format[0],
+        docx_method=args.docx_method,
+        high_quality=not args.draft,
+        dpi=args.dpi,
+        page_workers=args.page_workers,
+        image_encoding=args.image_encoding,
+        jpeg_quality=args.jpeg_quality,
+        text_mode=args.text_mode,
+        page_separator=args.page_separator,
+        page_metrics=args.page_metrics,
+        pages=args.pages,
+        first_pages=args.first_pages,
+        max_pixels=int(args.max_megapixels * 1_000_000) if args.max_megapixels else None,
+        max_dimension=args.max_dimension,
+        color_mode=args.color,
+        ocr=args.ocr,
+        ocr_language=args.ocr_language,
+        ocr_workers=args.ocr_workers,
+        image_progressive=args.progressive,
+        encode_threads=args.encode_threads,
+        docx_volume_pages=args.volume_pages,
+        hardlink_copies=args.hardlink_copies,
+    )
+    # One settings object per requested format, converted together per file
+    settings_list = [replace(settings, output_format=output_format) for output_format in args.format]
+    aggregator = MetricsAggregator(args.metrics_file, args.metrics_log)
+
+    def emit(result):
+        aggregator.add(result)
+        aggregator.write_prometheus()
+        print(json.dumps(result), flush=True)
+
+    for item in settings_list:
+        missing = ConversionEngine(item).missing_libraries()
+        if missing:
+            log_to_stderr(missing)
+            return 2
+
+    workers = args.workers if args.workers > 0 else default_workers()
+
+    if args.watch:
+        from folder_watcher import FolderWatcher
+        if len(args.inputs) != 1 or not os.path.isdir(args.inputs[0]):
+            log_to_stderr("--watch needs exactly one input folder.")
+            return 2
+        if len(settings_list) > 1:
+            log_to_stderr("--watch converts to a single format.")
+            return 2
+        watcher = FolderWatcher(args.inputs[0], args.output, settings, workers=workers,
+                                state_path=args.state_file, settle_seconds=args.settle_seconds,
+                                recursive=args.recursive, include=split_patterns(args.include),
+                                exclude=split_patterns(args.exclude),
+                                on_result=emit)
+        try:
+            watcher.run()
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    files = expand_inputs(args.inputs, args.recursive, split_patterns(args.include),
+                          split_patterns(args.exclude))
+
+    if args.analyze:
+        scanned = preflight_files(files, check_available_libraries())
+        for _, report in scanned:
+            print(json.dumps(report.to_dict()), flush=True)
+        if not scanned:
+            log_to_stderr("No input files matched.")
+            return 2
+        return 1 if any(report.problem for _, report in scanned) else 0
+
+    cache = None
+    if args.cache or args.cache_dir:
+        cache = ConversionCache(args.cache_dir, max_bytes=args.cache_max_mb * 1024**2,
+                                max_age_days=args.cache_max_age_days)
+
+    # Only journaled on request: a default journal in the output folder would be
+    # truncated by the next run there, including parallel ones
+    journal = None
+    if args.journal:
+        if not args.resume and read_journal(args.journal)[0]:
+            log_to_stderr(f"{args.journal} already holds a job - continue it with --resume {args.journal} "
+                          f"or delete it first.")
+            return 2
+        journal = JobJournal(args.journal, settings_list, ENGINE_VERSION, argv=argv,
+                             resume=bool(args.resume), log=log_to_stderr)
+    cancel_event = threading.Event()
+
+    def request_stop(signum, frame):
+        # First Ctrl+C stops cleanly at the next page; a second one aborts
+        if journal:
+            log_to_stderr(f"Stopping - resume with: --resume {journal.path}")
+        else:
+            log_to_stderr("Stopping - pass --journal next time to be able to resume")
+        cancel_event.set()
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+
+    previous_handler = signal.signal(signal.SIGINT, request_stop)
+    failed = 0
+    converted = 0
+    try:
+        for result in run_batch(files, args.output, settings_list, workers=workers, cache=cache,
+                                cancel_event=cancel_event, journal=journal, preflight=args.preflight,
+                                route=args.route):
+            converted += 1
+            if not result["success"]:
+                failed += 1
+            emit(result)
+    finally:
+        signal.signal(signal.SIGINT, previous_handler)
+        if journal:
+            journal.close()
+
+    log_to_stderr(f"Summary: {json.dumps(aggregator.summary())}")
+    if not converted:
+        log_to_stderr("No input files matched.")
+        return 2
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(cli_main())
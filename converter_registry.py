@@ -0,0 +1,104 @@
+"""Registry of converter backends, one or more per output format.
+
+A backend names the ``ConversionEngine`` method that does the work and the
+libraries it needs. Library availability is probed with
+``importlib.util.find_spec`` so nothing heavy (PyMuPDF, pdf2image, python-docx)
+is imported until a backend actually runs - a plain PDF copy never loads them.
+
+New formats register themselves with ``register_backend`` instead of growing an
+if/elif chain.
+"""
+import importlib.util
+from dataclasses import dataclass, field
+
+# Library key used throughout the engine -> importable module
+LIBRARY_MODULES = {
+    'pdf2image': 'pdf2image',
+    'pypdf': 'PyPDF2',
+    'fitz': 'fitz',
+    'python_docx': 'docx',
+    'pil': 'PIL',
+}
+
+# Library key -> name shown to users
+LIBRARY_NAMES = {
+    'pdf2image': 'pdf2image',
+    'pypdf': 'PyPDF2',
+    'fitz': 'PyMuPDF',
+    'python_docx': 'python-docx',
+    'pil': 'Pillow',
+}
+
+
+def module_available(module_name):
+    """True when ``module_name`` can be imported, without importing it"""
+    try:
+        return importlib.util.find_spec(module_name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def check_available_libraries():
+    """Check which conversion libraries are installed"""
+    return {key: module_available(module) for key, module in LIBRARY_MODULES.items()}
+
+
+@dataclass
+class ConverterBackend:
+    output_format: str
+    method: str  # ConversionEngine method taking (pdf_path, output_path)
+    label: str = ""  # Shown in the GUI format picker
+    description: str = ""  # Used in "... required for <description>" messages
+    # Alternative library sets; the backend works when every library of any one set is installed
+    requires: list = field(default_factory=list)
+    variant: str = None  # docx_method this backend handles; None handles every method
+    uses_dpi: bool = False
+    page_folder: bool = False  # Multi-page documents produce a folder of files
+    io_bound: bool = False  # Only moves bytes around; batches run it on threads, not processes
+
+    def is_available(self, libraries):
+        return not self.requires or any(all(libraries.get(key) for key in option)
+                                        for option in self.requires)
+
+    def requirement_message(self):
+        """E.g. "PyMuPDF or pdf2image is required for image conversion." """
+        options = [" and ".join(LIBRARY_NAMES[key] for key in option) for option in self.requires]
+        verb = "are" if len(options) == 1 and len(self.requires[0]) > 1 else "is"
+        return f"{' or '.join(options)} {verb} required for {self.description}."
+
+
+_backends = {}
+
+
+def register_backend(backend):
+    """Add ``backend``; later registrations for the same format and variant win"""
+    backends = _backends.setdefault(backend.output_format, [])
+    backends[:] = [existing for existing in backends if existing.variant != backend.variant]
+    backends.append(backend)
+    return backend
+
+
+def output_formats():
+    return list(_backends)
+
+
+def format_variants(output_format):
+    return [backend.variant for backend in _backends.get(output_format, []) if backend.variant]
+
+
+def format_labels():
+    """``[(label, output_format)]`` for every registered format"""
+    return [(backends[0].label or output_format, output_format)
+            for output_format, backends in _backends.items()]
+
+
+def backend_for(output_format, variant=None):
+    """The backend converting to ``output_format`` (picking ``variant`` when there are several)"""
+    backends = _backends.get(output_format, [])
+    for backend in backends:
+        if backend.variant == variant:
+            return backend
+    for backend in backends:
+        if backend.variant is None:
+            return backend
+    return backends[0] if backends else None
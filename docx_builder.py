@@ -0,0 +1,43 @@
+"""Paragraph extraction for text-heavy DOCX documents.
+
+Text pages become one paragraph per PyMuPDF text block rather than one per
+line, which keeps both the document and the work of writing it small. The
+paragraphs are written by ``docx_stream``.
+"""
+import re
+
+# Characters XML 1.0 does not allow; Word refuses documents containing them
+XML_INVALID = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+
+def join_lines(lines):
+    """Reflow the lines of one block into a single paragraph string"""
+    paragraph = ""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if not paragraph or paragraph.endswith("-"):
+            # A trailing hyphen is kept but not followed by a space
+            paragraph += line
+        else:
+            paragraph += " " + line
+    return paragraph
+
+
+def block_paragraphs(page):
+    """One paragraph per text block of a PyMuPDF page, images skipped"""
+    paragraphs = []
+    for block in page.get_text("blocks"):
+        if block[6] != 0:
+            continue
+        paragraph = join_lines(block[4].split("\n"))
+        if paragraph:
+            paragraphs.append(paragraph)
+    return paragraphs
+
+
+def text_paragraphs(text):
+    """Paragraphs of plain text (e.g. OCR output), which separates them with blank lines"""
+    paragraphs = (join_lines(chunk.split("\n")) for chunk in re.split(r"\n\s*\n", text))
+    return [paragraph for paragraph in paragraphs if paragraph]
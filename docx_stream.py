@@ -0,0 +1,205 @@
+"""Streaming DOCX writer for documents too large to hold in memory.
+
+python-docx keeps the whole package - every embedded page image included -
+in memory until ``Document.save``. This writer adds each image to the zip as
+soon as it arrives and spools the body XML to a temporary file, so the
+writer holds about one page however long the document gets (page workers
+add a few bounded chunks of pages in flight). Styles, theme and
+settings are copied from python-docx's default template, so the result looks
+like any other python-docx document.
+
+``DocxVolumes`` additionally starts a new file every N pages.
+"""
+import os
+import shutil
+import zipfile
+import tempfile
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
+from docx_builder import XML_INVALID
+
+EMU_PER_INCH = 914400
+
+# Body XML beyond this many bytes goes to a temporary file instead of memory
+BODY_SPOOL_BYTES = 4 * 1024 * 1024
+
+IMAGE_RELATIONSHIP = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/image"
+
+IMAGE_CONTENT_TYPES = (
+    '<Default Extension="png" ContentType="image/png"/>'
+    '<Default Extension="jpg" ContentType="image/jpeg"/>'
+)
+
+PAGE_BREAK_XML = '<w:p><w:r><w:br w:type="page"/></w:r></w:p>'
+
+# Same markup python-docx writes for an inline picture
+PICTURE_XML = (
+    '<w:p><w:r><w:drawing><wp:inline distT="0" distB="0" distL="0" distR="0">'
+    '<wp:extent cx="{cx}" cy="{cy}"/><wp:docPr id="{id}" name="Picture {id}"/>'
+    '<wp:cNvGraphicFramePr><a:graphicFrameLocks xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" '
+    'noChangeAspect="1"/></wp:cNvGraphicFramePr>'
+    '<a:graphic xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main">'
+    '<a:graphicData uri="http://schemas.openxmlformats.org/drawingml/2006/picture">'
+    '<pic:pic xmlns:pic="http://schemas.openxmlformats.org/drawingml/2006/picture">'
+    '<pic:nvPicPr><pic:cNvPr id="0" name="{name}"/><pic:cNvPicPr/></pic:nvPicPr>'
+    '<pic:blipFill><a:blip r:embed="{rel_id}"/><a:stretch><a:fillRect/></a:stretch></pic:blipFill>'
+    '<pic:spPr><a:xfrm><a:off x="0" y="0"/><a:ext cx="{cx}" cy="{cy}"/></a:xfrm>'
+    '<a:prstGeom prst="rect"/></pic:spPr></pic:pic></a:graphicData></a:graphic>'
+    '</wp:inline></w:drawing></w:r></w:p>'
+)
+
+
+@lru_cache(maxsize=1)
+def load_template():
+    """Parts of python-docx's default template: ``(other_parts, document, rels, content_types)``"""
+    import docx
+    path = os.path.join(os.path.dirname(docx.__file__), "templates", "default.docx")
+    other_parts = []
+    with zipfile.ZipFile(path) as template:
+        for info in template.infolist():
+            data = template.read(info)
+            if info.filename == "word/document.xml":
+                document = data.decode("utf-8")
+            elif info.filename == "word/_rels/document.xml.rels":
+                rels = data.decode("utf-8")
+            elif info.filename == "[Content_Types].xml":
+                content_types = data.decode("utf-8")
+            else:
+                other_parts.append((info.filename, data))
+    return other_parts, document, rels, content_types
+
+
+def paragraph_xml(text, style_id=None):
+    """A ``w:p`` holding ``text`` as a single run"""
+    style = f'<w:pPr><w:pStyle w:val="{style_id}"/></w:pPr>' if style_id else ""
+    text = escape(XML_INVALID.sub("", text))
+    # Keep leading/trailing spaces that Word would otherwise drop
+    return f'<w:p>{style}<w:r><w:t xml:space="preserve">{text}</w:t></w:r></w:p>'
+
+
+class StreamingDocxWriter:
+    def __init__(self, path):
+        other_parts, document, self.rels, content_types = load_template()
+        body_start = document.index("<w:body>") + len("<w:body>")
+        self.document_head = document[:body_start]
+        # The template's section properties (page size, margins) close the body
+        self.document_tail = document[document.index("<w:sectPr"):]
+
+        self.zip = zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED, allowZip64=True)
+        self.zip.writestr("[Content_Types].xml",
+                          content_types.replace("</Types>", IMAGE_CONTENT_TYPES + "</Types>"))
+        for name, data in other_parts:
+            self.zip.writestr(name, data)
+        self.body = tempfile.SpooledTemporaryFile(max_size=BODY_SPOOL_BYTES)
+        self.images = []  # (relationship id, target)
+
+    def write(self, xml):
+        self.body.write(xml.encode("utf-8"))
+
+    def add_paragraph(self, text, style_id=None):
+        self.write(paragraph_xml(text, style_id))
+
+    def add_paragraphs(self, paragraphs):
+        self.write("".join(paragraph_xml(text) for text in paragraphs))
+
+    def add_page_break(self):
+        self.write(PAGE_BREAK_XML)
+
+    def add_picture(self, image_bytes, width_inches):
+        """Append an inline picture ``width_inches`` wide, keeping its aspect ratio"""
+        from docx.image.image import Image
+        image = Image.from_blob(image_bytes)
+        number = len(self.images) + 1
+        rel_id = f"rIdImage{number}"
+        target = f"media/image{number}.{image.ext}"
+        # PNG and JPEG are compressed already; deflating them again only costs time
+        self.zip.writestr(f"word/{target}", image_bytes, compress_type=zipfile.ZIP_STORED)
+        self.images.append((rel_id, target))
+
+        cx = int(width_inches * EMU_PER_INCH)
+        cy = int(round(cx * image.height / image.width))
+        self.write(PICTURE_XML.format(cx=cx, cy=cy, id=number, name=f"image{number}.{image.ext}",
+                                      rel_id=rel_id))
+
+    def close(self):
+        """Write the document part and relationships, completing the package"""
+        image_rels = "".join(f'<Relationship Id="{rel_id}" Type="{IMAGE_RELATIONSHIP}" Target="{target}"/>'
+                             for rel_id, target in self.images)
+        self.zip.writestr("word/_rels/document.xml.rels",
+                          self.rels.replace("</Relationships>", image_rels + "</Relationships>"))
+        with self.zip.open("word/document.xml", 'w', force_zip64=True) as part:
+            part.write(self.document_head.encode("utf-8"))
+            self.body.seek(0)
+            shutil.copyfileobj(self.body, part)
+            part.write(self.document_tail.encode("utf-8"))
+        self.zip.close()
+        self.body.close()
+
+    def abort(self):
+        """Stop without completing the package; the caller discards the file"""
+        self.zip.close()
+        self.body.close()
+
+
+class DocxVolumes:
+    """Hands out a writer per page, starting a new file every ``pages_per_volume`` pages.
+
+    A document that fits in one volume is written to ``path`` itself; longer
+    ones go to a folder named after it (``report/volume_1.docx``, ...), the
+    layout multi-page image exports use. ``on_volume`` is called with every
+    new writer, e.g. to repeat a title.
+    """
+
+    def __init__(self, path, page_count, pages_per_volume=None, on_volume=None):
+        self.path = path
+        self.pages_per_volume = pages_per_volume
+        self.split = bool(pages_per_volume) and page_count > pages_per_volume
+        self.on_volume = on_volume
+        self.writer = None
+        self.volumes = 0
+        self.pages_in_volume = 0
+
+    def start_volume(self):
+        if self.writer:
+            self.writer.close()
+        self.volumes += 1
+        path = self.path
+        if self.split:
+            folder = os.path.splitext(self.path)[0]
+            os.makedirs(folder, exist_ok=True)
+            path = os.path.join(folder, f"volume_{self.volumes}.docx")
+        self.writer = StreamingDocxWriter(path)
+        self.pages_in_volume = 0
+        if self.on_volume:
+            self.on_volume(self.writer)
+
+    def page(self):
+        """Writer for the next page, and whether that page opens its volume"""
+        if self.writer is None or (self.split and self.pages_in_volume == self.pages_per_volume):
+            self.start_volume()
+        self.pages_in_volume += 1
+        return self.writer, self.pages_in_volume == 1
+
+    def close(self):
+        """Complete the last volume; safe to call more than once"""
+        if self.volumes == 0:
+            # Nothing was added; still produce a (possibly titled) document
+            self.start_volume()
+        if self.writer:
+            self.writer.close()
+            self.writer = None
+
+    def abort(self):
+        if self.writer:
+            self.writer.abort()
+            self.writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
@@ -0,0 +1,79 @@
+"""Lazy discovery of PDF files in (possibly huge) directory trees.
+
+Paths are yielded while the tree is still being walked, so conversion can
+start on the first file long before the last folder has been listed.
+"""
+import os
+from fnmatch import fnmatchcase
+
+
+def is_pdf(name):
+    """Case-insensitive ``.pdf`` check that skips hidden files"""
+    name = os.path.basename(name)
+    return name.lower().endswith(".pdf") and not name.startswith(".")
+
+
+def split_patterns(text):
+    """Turn ``"*.pdf, archive/*"`` into a list of patterns"""
+    return [pattern.strip() for pattern in (text or "").split(",") if pattern.strip()]
+
+
+def matches_any(relative_path, patterns):
+    """Match a relative path against glob patterns, ignoring case.
+
+    Patterns containing a slash are matched against the whole relative path,
+    others against the file or folder name alone.
+    """
+    relative_path = relative_path.replace(os.sep, "/").lower()
+    name = relative_path.rsplit("/", 1)[-1]
+    for pattern in patterns:
+        pattern = pattern.replace(os.sep, "/").lower()
+        if fnmatchcase(relative_path if "/" in pattern else name, pattern):
+            return True
+    return False
+
+
+def iter_pdfs(root, recursive=True, include=None, exclude=None):
+    """Yield ``(path, relative_folder)`` for every PDF below ``root``.
+
+    ``relative_folder`` is the file's folder relative to ``root`` ("" at the
+    top level) so callers can mirror the source layout. ``include`` patterns
+    restrict which files are taken; ``exclude`` patterns drop files and prune
+    whole folders from the walk.
+    """
+    include = include or []
+    exclude = exclude or []
+    pending = [""]
+
+    while pending:
+        relative_folder = pending.pop()
+        folder = os.path.join(root, relative_folder)
+        subfolders = []
+        try:
+            # Entries are streamed straight from scandir; only subfolder names
+            # are held until this folder is finished
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    relative_path = os.path.join(relative_folder, entry.name)
+                    if exclude and matches_any(relative_path, exclude):
+                        continue
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if recursive and not entry.name.startswith("."):
+                                subfolders.append(relative_path)
+                            continue
+                        if not entry.is_file():
+                            continue
+                    except OSError:
+                        continue
+                    if not is_pdf(entry.name):
+                        continue
+                    if include and not matches_any(relative_path, include):
+                        continue
+                    yield entry.path, relative_folder
+        except OSError:
+            # Unreadable or vanished folder - skip it rather than abort the walk
+            pass
+
+        # Depth-first
+        pending.extend(reversed(subfolders))
@@ -0,0 +1,228 @@
+"""Long-running watch mode that converts PDFs as they appear in a folder.
+
+Change notifications come from watchdog (inotify on Linux) when it is
+installed; otherwise the folder is rescanned on a timer. Either way a file is
+only converted once its size and mtime have stopped changing, and finished
+inputs are remembered in a JSON state file so a restart picks up where the
+previous run stopped.
+"""
+import os
+import json
+import time
+import queue
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from converter_engine import (ReservedNames, base_result, check_available_libraries, convert_one,
+                              install_cancel_event, log_to_stderr, unique_output_path)
+from file_discovery import is_pdf, iter_pdfs, matches_any
+from job_journal import file_signature
+
+STATE_FILE_NAME = ".pdf_converter_watch.json"
+
+
+class FolderWatcher:
+    def __init__(self, folder, output_dir, settings, workers=1, state_path=None,
+                 settle_seconds=2.0, poll_interval=1.0, rescan_interval=30.0,
+                 recursive=False, include=None, exclude=None, on_result=None, log=log_to_stderr):
+        self.folder = os.path.abspath(folder)
+        self.output_dir = output_dir
+        self.settings = settings
+        self.workers = max(1, workers)
+        self.state_path = state_path or os.path.join(output_dir, STATE_FILE_NAME)
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self.rescan_interval = rescan_interval
+        self.recursive = recursive
+        self.include = include or []
+        self.exclude = exclude or []
+        self.on_result = on_result
+        self.log = log
+
+        # path -> {"signature": [...], "output": ..., "success": ...} for finished
+        # inputs; failures are kept too so a broken file is not retried until
+        # it changes again
+        self.state = self.load_state()
+        # path -> (signature, first time it was seen with that signature)
+        self.candidates = {}
+        # path -> signature for files queued or being converted right now
+        self.in_progress = {}
+        self.events = queue.Queue()
+        self.reserved = ReservedNames(entry["output"] for entry in self.state.values() if entry.get("output"))
+
+    def load_state(self):
+        try:
+            with open(self.state_path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_state(self):
+        # Write then rename so a crash never leaves a truncated state file
+        temp_path = self.state_path + ".tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=1)
+        os.replace(temp_path, self.state_path)
+
+    def start_notifications(self):
+        """Subscribe to filesystem events, returning the observer or None for polling"""
+        try:
+            from watchdog.observers import Observer
+            from watchdog.events import FileSystemEventHandler
+        except ImportError:
+            return None
+
+        events = self.events
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if event.is_directory:
+                    return
+                # Moves report the new name in dest_path
+                path = getattr(event, "dest_path", None) or event.src_path
+                events.put(path)
+
+        observer = Observer()
+        observer.schedule(Handler(), self.folder, recursive=self.recursive)
+        observer.start()
+        return observer
+
+    def scan(self):
+        """Find every PDF in the folder (used at startup and by the polling fallback)"""
+        for path, _ in iter_pdfs(self.folder, self.recursive, self.include, self.exclude):
+            yield path
+
+    def wanted(self, path):
+        """Apply the same filters as ``scan`` to a path reported by a notification"""
+        relative_path = os.path.relpath(path, self.folder)
+        if not is_pdf(path) or relative_path.startswith(".."):
+            return False
+        if not self.recursive and os.path.dirname(relative_path):
+            return False
+        parts = relative_path.split(os.sep)
+        # Excluding a folder excludes everything below it
+        if self.exclude and any(matches_any(os.sep.join(parts[:i]), self.exclude)
+                                for i in range(1, len(parts) + 1)):
+            return False
+        return not self.include or matches_any(relative_path, self.include)
+
+    def note_candidate(self, path):
+        """Track ``path`` if it is new or changed since it was last converted"""
+        signature = file_signature(path)
+        if signature is None or signature[0] == 0:
+            self.candidates.pop(path, None)
+            return
+        done = self.state.get(path)
+        if done and done["signature"] == signature:
+            return
+        if self.in_progress.get(path) == signature:
+            return
+        previous = self.candidates.get(path)
+        if previous is None or previous[0] != signature:
+            self.candidates[path] = (signature, time.monotonic())
+
+    def settled_candidates(self):
+        """Pop candidates whose size and mtime have not changed for ``settle_seconds``"""
+        now = time.monotonic()
+        ready = []
+        for path, (signature, seen_at) in list(self.candidates.items()):
+            current = file_signature(path)
+            if current != signature:
+                # Still being written (or deleted) - restart the settle timer
+                self.note_candidate(path)
+            elif now - seen_at >= self.settle_seconds:
+                del self.candidates[path]
+                ready.append((path, signature))
+        return ready
+
+    def output_path_for(self, path):
+        """Reconverted inputs overwrite their previous output instead of piling up copies"""
+        done = self.state.get(path)
+        if done and done.get("output"):
+            return done["output"]
+        # Mirror the watched folder's layout in the output folder
+        target_dir = os.path.join(self.output_dir, os.path.dirname(os.path.relpath(path, self.folder)))
+        os.makedirs(target_dir, exist_ok=True)
+        file_name = os.path.splitext(os.path.basename(path))[0]
+        return unique_output_path(target_dir, file_name, self.settings.output_format, self.reserved)
+
+    def run(self, stop_event=None):
+        """Watch until ``stop_event`` is set (or forever)"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        libraries = check_available_libraries()
+
+        observer = self.start_notifications()
+        self.log(f"Watching {self.folder} ({'notifications' if observer else 'polling'})")
+
+        # Spawn rather than fork: the GUI process has Tk and worker threads alive
+        context = multiprocessing.get_context("spawn")
+        # Workers ignore Ctrl+C; stopping is up to this process, which tells
+        # running conversions through the shared cancel flag
+        worker_cancel = context.Event()
+        executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=context,
+                                       initializer=install_cancel_event, initargs=(worker_cancel,))
+        running = {}
+        waiting = []
+        last_scan = None
+        try:
+            while not (stop_event and stop_event.is_set()):
+                # Full rescans catch files from before startup and anything
+                # the notifications missed; without notifications they are
+                # the only source of changes
+                rescan_every = self.rescan_interval if observer else self.poll_interval
+                if last_scan is None or time.monotonic() - last_scan >= rescan_every:
+                    for path in self.scan():
+                        self.note_candidate(path)
+                    last_scan = time.monotonic()
+
+                while True:
+                    try:
+                        path = self.events.get_nowait()
+                    except queue.Empty:
+                        break
+                    if self.wanted(path):
+                        self.note_candidate(path)
+
+                for path, signature in self.settled_candidates():
+                    # A file changed again mid-conversion is picked up after
+                    # the running job finishes
+                    if path not in self.in_progress:
+                        self.in_progress[path] = signature
+                        waiting.append((path, signature))
+
+                # Bounded concurrency: never more jobs in flight than workers
+                while waiting and len(running) < self.workers:
+                    path, signature = waiting.pop(0)
+                    output_path = self.output_path_for(path)
+                    future = executor.submit(convert_one, path, output_path, self.settings, libraries)
+                    running[future] = (path, signature)
+
+                for future in [future for future in running if future.done()]:
+                    path, signature = running.pop(future)
+                    self.finish(future, path, signature)
+
+                time.sleep(self.poll_interval if not running else min(self.poll_interval, 0.2))
+        finally:
+            if observer:
+                observer.stop()
+                observer.join()
+            # Interrupted jobs are not recorded, so they run again on the next start
+            worker_cancel.set()
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def finish(self, future, path, signature):
+        try:
+            result = future.result()
+        except Exception as e:
+            # A worker died (e.g. a native crash inside PyMuPDF)
+            result = base_result(path, None, self.settings, f"Worker failed: {e}")
+
+        del self.in_progress[path]
+        self.state[path] = {
+            "signature": signature,
+            "output": result["output"] if result["success"] else None,
+            "success": result["success"],
+        }
+        self.save_state()
+        if self.on_result:
+            self.on_result(result)
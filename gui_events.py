@@ -0,0 +1,99 @@
+"""Plumbing between conversion threads and the Tk GUI.
+
+Worker threads never touch widgets. They post to a ``UiEventQueue`` and the
+Tk thread drains it from a timer, applying everything that arrived since the
+last tick in one go: only the newest status/progress values are shown, new
+result lines are inserted with a single widget call and queued callbacks run
+last, in order.
+"""
+import threading
+import tkinter as tk
+from tkinter import ttk
+from collections import deque
+
+# Timer interval for draining the queue - about one UI update per frame
+UI_REFRESH_MS = 50
+
+# Lines kept for export; older ones are dropped (and counted)
+MAX_LOG_LINES = 100_000
+# Lines the text widget itself holds; more make Tk slow to insert and scroll
+DISPLAY_LINES = 2_000
+
+
+class UiEventQueue:
+    """Thread-safe mailbox from worker threads to the Tk thread"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latest = {}  # name -> newest value ("status", "progress", ...)
+        self.lines = []
+        self.calls = []
+
+    def set(self, name, value):
+        """Post a value where only the newest one matters"""
+        with self.lock:
+            self.latest[name] = value
+
+    def add_line(self, line):
+        with self.lock:
+            self.lines.append(line)
+
+    def call(self, function, *args):
+        """Run ``function(*args)`` on the Tk thread after the events posted before it"""
+        with self.lock:
+            self.calls.append((function, args))
+
+    def drain(self):
+        """Take everything posted so far: ``(latest, lines, calls)``"""
+        with self.lock:
+            latest, self.latest = self.latest, {}
+            lines, self.lines = self.lines, []
+            calls, self.calls = self.calls, []
+        return latest, lines, calls
+
+
+class ResultLog:
+    """Capped results view: the widget shows the newest lines, export has them all"""
+
+    def __init__(self, parent, height=8):
+        self.lines = deque(maxlen=MAX_LOG_LINES)
+        self.dropped = 0
+        self.shown = 0  # Lines currently in the text widget
+
+        self.text = tk.Text(parent, height=height, wrap=tk.WORD)
+        self.scrollbar = ttk.Scrollbar(parent, orient="vertical", command=self.text.yview)
+        self.text.configure(yscrollcommand=self.scrollbar.set)
+
+    def grid(self, row=0, column=0):
+        self.text.grid(row=row, column=column, sticky=(tk.W, tk.E, tk.N, tk.S))
+        self.scrollbar.grid(row=row, column=column + 1, sticky=(tk.N, tk.S))
+
+    def append(self, new_lines):
+        """Add a batch of lines with one insert (call from the Tk thread)"""
+        if not new_lines:
+            return
+        overflow = len(self.lines) + len(new_lines) - MAX_LOG_LINES
+        if overflow > 0:
+            self.dropped += overflow
+        self.lines.extend(new_lines)
+
+        visible = new_lines[-DISPLAY_LINES:]
+        self.text.insert(tk.END, "\n".join(visible) + "\n")
+        self.shown += len(visible)
+        if self.shown > DISPLAY_LINES:
+            self.text.delete("1.0", f"{self.shown - DISPLAY_LINES + 1}.0")
+            self.shown = DISPLAY_LINES
+        self.text.see(tk.END)
+
+    def clear(self):
+        self.lines.clear()
+        self.dropped = 0
+        self.shown = 0
+        self.text.delete("1.0", tk.END)
+
+    def export(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            if self.dropped:
+                f.write(f"... {self.dropped} earlier lines dropped\n")
+            for line in self.lines:
+                f.write(line + "\n")
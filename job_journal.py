@@ -0,0 +1,109 @@
+"""Append-only journal that lets an interrupted batch resume where it stopped.
+
+The first line describes the job (a settings fingerprint plus, for the CLI,
+the original arguments); every following line records one finished input::
+
+    {"type": "job", "fingerprint": "...", "argv": [...], "cwd": "...", "created": ...}
+    {"type": "file", "input": "/abs/a.pdf", "format": "docx", "signature": [size, mtime_ns],
+     "output": "...", "success": true}
+
+Lines are only ever appended, so a crash can at worst lose the line being
+written. Resuming skips outputs (input plus format) that converted
+successfully, whose input is unchanged since, and that still exist.
+"""
+import os
+import json
+import time
+
+from conversion_cache import produced_path, settings_fingerprint
+
+JOURNAL_FILE_NAME = ".pdf_converter_journal.jsonl"
+
+
+def file_signature(path):
+    """``(size, mtime_ns)`` of a file, or None if it vanished"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def read_journal(path):
+    """Return ``(header, [file records])``; unreadable lines (a torn last write) are skipped"""
+    header = None
+    records = []
+    try:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if entry.get("type") == "job" and header is None:
+                    header = entry
+                elif entry.get("type") == "file":
+                    records.append(entry)
+    except OSError:
+        pass
+    return header, records
+
+
+class JobJournal:
+    def __init__(self, path, settings, engine_version, argv=None, resume=True, log=None):
+        """``settings`` is one ``ConversionSettings`` or a list (a multi-format job)"""
+        self.path = path
+        settings_list = settings if isinstance(settings, (list, tuple)) else [settings]
+        self.fingerprint = "\n".join(settings_fingerprint(item, engine_version) for item in settings_list)
+        # (input path, output format) -> latest record
+        self.completed = {}
+
+        header, records = read_journal(path) if resume else (None, [])
+        if header and header.get("fingerprint") != self.fingerprint:
+            if log:
+                log(f"Settings changed since {path} was written - starting a fresh journal")
+            header = None
+
+        if header:
+            for record in records:
+                self.completed[record["input"], record.get("format")] = record
+            self.file = open(path, 'a', encoding='utf-8')
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self.file = open(path, 'w', encoding='utf-8')
+            self.append({"type": "job", "fingerprint": self.fingerprint, "argv": argv,
+                         "cwd": os.getcwd(), "created": time.time()})
+
+    def append(self, entry):
+        # ASCII escapes keep file names that are not valid UTF-8 (decoded to lone
+        # surrogates) writable, and they read back as the same str
+        self.file.write(json.dumps(entry) + "\n")
+        # Flushed per line so a crash loses at most the file being converted
+        self.file.flush()
+
+    def finished_output(self, file_path, output_format):
+        """Output of an earlier successful conversion of this exact input, or None"""
+        record = self.completed.get((os.path.abspath(file_path), output_format))
+        if not record or not record["success"]:
+            return None
+        if record["signature"] != file_signature(file_path):
+            return None
+        if not record["output"] or produced_path(record["output"]) is None:
+            return None
+        return record["output"]
+
+    def record(self, result):
+        file_path = os.path.abspath(result["input"])
+        record = {
+            "type": "file",
+            "input": file_path,
+            "format": result["format"],
+            "signature": file_signature(file_path),
+            "output": result["output"] if result["success"] else None,
+            "success": result["success"],
+        }
+        self.completed[file_path, result["format"]] = record
+        self.append(record)
+
+    def close(self):
+        self.file.close()
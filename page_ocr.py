@@ -0,0 +1,157 @@
+"""OCR for pages that have no text layer.
+
+Recognition runs through Tesseract, either via PyMuPDF's built-in OCR
+(``Page.get_textpage_ocr``) or via pytesseract, whichever is installed. Both
+run offline. Pages are recognized in chunks by a process pool and every
+result is cached under a hash of the page's content, so a re-run only
+recognizes pages it has not seen before.
+"""
+import os
+import time
+import shutil
+import hashlib
+import tempfile
+import importlib.util
+from conversion_cache import default_cache_dir
+from page_renderer import page_worker_stopped, split_pages, start_page_pool, wait_for_chunk
+
+OCR_DPI = 300
+
+
+def ocr_engine(libraries):
+    """Name of the OCR route that can run here ("fitz" or "pytesseract"), or None"""
+    if libraries.get('fitz'):
+        import fitz
+        try:
+            fitz.get_tessdata()
+            return "fitz"
+        except (RuntimeError, AttributeError):
+            pass
+    if (shutil.which("tesseract") and importlib.util.find_spec("pytesseract")
+            and importlib.util.find_spec("PIL")):
+        return "pytesseract"
+    return None
+
+
+def page_content_hash(pdf_document, page, engine, language):
+    """Hash of everything that shows on a page: content streams, images, size and rotation"""
+    digest = hashlib.sha256(f"{engine}\n{language}\n{OCR_DPI}\n{tuple(page.rect)}\n{page.rotation}\n".encode())
+    digest.update(page.read_contents())
+    for image in page.get_images(full=True):
+        digest.update(pdf_document.xref_stream_raw(image[0]) or b"")
+    return digest.hexdigest()
+
+
+class OcrCache:
+    """One text file per recognized page, named by its content hash"""
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or os.path.join(default_cache_dir(), "ocr")
+
+    def path_for(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.txt")
+
+    def get(self, key):
+        try:
+            with open(self.path_for(key), encoding='utf-8') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put(self, key, text):
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename so concurrent runs never read a partial entry
+        handle, temp_path = tempfile.mkstemp(prefix=".tmp-", dir=os.path.dirname(path))
+        with os.fdopen(handle, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(temp_path, path)
+
+
+def recognize_page(page, engine, language):
+    if engine == "fitz":
+        textpage = page.get_textpage_ocr(language=language, dpi=OCR_DPI, full=True)
+        return page.get_text(textpage=textpage)
+
+    import fitz
+    import pytesseract
+    from PIL import Image
+    pix = page.get_pixmap(matrix=fitz.Matrix(OCR_DPI/72, OCR_DPI/72), colorspace=fitz.csGRAY)
+    image = Image.frombuffer("L", (pix.width, pix.height), pix.samples, "raw", "L", pix.stride, 1)
+    return pytesseract.image_to_string(image, lang=language)
+
+
+def recognize_chunk(pdf_path, page_numbers, engine, language):
+    """OCR ``page_numbers`` with a private document handle (runs in a worker).
+
+    Returns ``[(page_num, text, seconds), ...]``.
+    """
+    import fitz
+    # Pages are already spread over processes; Tesseract's own threads would
+    # only fight them for the same cores
+    os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+    pdf_document = fitz.open(pdf_path)
+    try:
+        results = []
+        for page_num in page_numbers:
+            if page_worker_stopped():
+                break
+            started = time.perf_counter()
+            text = recognize_page(pdf_document.load_page(page_num), engine, language)
+            results.append((page_num, text, time.perf_counter() - started))
+        return results
+    finally:
+        pdf_document.close()
+
+
+def recognize_pages(pdf_path, page_numbers, engine, language="eng", workers=1, min_text_chars=1,
+                    cache=None, metrics=None, cancel_event=None):
+    """OCR the pages among ``page_numbers`` that lack a text layer.
+
+    Returns ``({page_num: text}, cached_page_count)``. Pages whose text layer
+    has at least ``min_text_chars`` characters are left alone. Setting
+    ``cancel_event`` stops the OCR workers at their next page.
+    """
+    import fitz
+    texts = {}
+    keys = {}
+    cached = 0
+    pdf_document = fitz.open(pdf_path)
+    try:
+        for page_num in page_numbers:
+            page = pdf_document.load_page(page_num)
+            if len(page.get_text().strip()) >= min_text_chars:
+                continue
+            key = page_content_hash(pdf_document, page, engine, language)
+            text = cache.get(key) if cache else None
+            if text is None:
+                keys[page_num] = key
+            else:
+                texts[page_num] = text
+                cached += 1
+    finally:
+        pdf_document.close()
+
+    pending = sorted(keys)
+    if not pending:
+        return texts, cached
+
+    def record(results):
+        for page_num, text, seconds in results:
+            texts[page_num] = text
+            if cache:
+                cache.put(keys[page_num], text)
+            if metrics:
+                metrics.add_time("ocr", seconds)
+
+    if workers <= 1 or len(pending) < 2:
+        record(recognize_chunk(pdf_path, pending, engine, language))
+        return texts, cached
+
+    chunks = split_pages(pending, workers)
+    executor, stop_event = start_page_pool(min(workers, len(chunks)))
+    with executor:
+        futures = [executor.submit(recognize_chunk, pdf_path, chunk, engine, language) for chunk in chunks]
+        for future in futures:
+            record(wait_for_chunk(future, stop_event, cancel_event))
+    return texts, cached
@@ -0,0 +1,67 @@
+"""Page selection shared by every output format.
+
+Ranges use 1-based page numbers, negative numbers count from the end::
+
+    "1-3,10,-1"   pages 1, 2, 3, 10 and the last page
+    "5-"          page 5 to the end
+    "-3--1"       the last three pages
+"""
+import re
+
+RANGE_PATTERN = re.compile(r"^(-?\d+)(?:(-)(-?\d+)?)?$")
+
+
+def parse_range_tokens(spec):
+    """Split a range spec into ``(start, end)`` pairs; ``end`` None means "to the last page".
+
+    Raises ValueError on malformed input.
+    """
+    tokens = []
+    for token in spec.split(","):
+        token = token.replace(" ", "")
+        if not token:
+            continue
+        match = RANGE_PATTERN.match(token)
+        if match:
+            start = int(match.group(1))
+            if match.group(2) is None:
+                end = start
+            else:
+                end = int(match.group(3)) if match.group(3) else None
+        if not match or start == 0 or end == 0:
+            raise ValueError(f"Invalid page range '{token}' - use e.g. 1-3,10,-1")
+        # Only comparable without the page count when both ends count the same way
+        if end is not None and (start > 0) == (end > 0) and start > end:
+            raise ValueError(f"Invalid page range '{token}' - the first page comes after the last")
+        tokens.append((start, end))
+    return tokens
+
+
+def validate_page_ranges(spec):
+    """argparse type: check the syntax and return the spec unchanged"""
+    parse_range_tokens(spec)
+    return spec
+
+
+def select_pages(page_count, page_range=None, first_pages=None):
+    """0-based page numbers to convert, in document order.
+
+    Pages outside the document are ignored; ``first_pages`` keeps only the
+    first N of whatever the range selected.
+    """
+    if page_range:
+        def resolve(number):
+            return number - 1 if number > 0 else page_count + number
+
+        selected = set()
+        for start, end in parse_range_tokens(page_range):
+            first = max(resolve(start), 0)
+            last = min(resolve(end) if end is not None else page_count - 1, page_count - 1)
+            selected.update(range(first, last + 1))
+        pages = sorted(selected)
+    else:
+        pages = list(range(page_count))
+
+    if first_pages:
+        pages = pages[:first_pages]
+    return pages
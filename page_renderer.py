@@ -0,0 +1,377 @@
+"""Page rasterization helpers shared by the conversion engine.
+
+Large documents can be split across worker processes; every worker opens its
+own PyMuPDF handle because ``fitz.Document`` objects cannot be shared. Within
+one process, pages are rendered on the calling thread while Pillow encodes
+earlier pages on a thread pool - its encoders release the GIL.
+"""
+import io
+import os
+import math
+import time
+import shutil
+import importlib.util
+import signal
+import tempfile
+import multiprocessing
+from dataclasses import dataclass
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+# Chunks handed to each page worker - small enough that early pages come back
+# quickly, large enough that reopening the document stays cheap
+CHUNKS_PER_WORKER = 4
+# Upper bound on a chunk's pages, so the encoded pages in flight stay the same
+# however long the document is
+MAX_CHUNK_PAGES = 8
+
+# Raw pixmap bytes allowed to wait for an encoder thread - four A4 pages at
+# 300 dpi, but a single A0 page at 150 dpi (about 100 MB)
+ENCODE_WINDOW_BYTES = 128 * 1024 * 1024
+
+# How often a process waiting on workers (batch or page workers) checks for a
+# cancel request
+CANCEL_POLL_SECONDS = 0.2
+
+
+COLOR_MODES = ["rgb", "gray", "mono"]
+
+# Pillow format name of every encoding a RenderPolicy can ask for
+PIL_FORMATS = {"png": "PNG", "jpeg": "JPEG", "webp": "WEBP"}
+
+
+@dataclass
+class RenderPolicy:
+    """How pages are rasterized; picklable so it can travel to page workers"""
+    dpi: float = 300  # Upper bound, lowered per page to fit the budgets below
+    max_pixels: int = None  # Pixel budget per page (width * height)
+    max_dimension: int = None  # Longest side in pixels
+    color_mode: str = "rgb"  # "rgb", "gray" or "mono" (1-bit, for black-and-white scans)
+    encoding: str = "png"  # "png", "jpeg" or "webp"
+    jpeg_quality: int = 85  # Also used for WebP
+    progressive: bool = False  # Progressive JPEG; PNG and WebP have no such variant here
+
+    def page_dpi(self, width, height):
+        """DPI for a page of ``width`` x ``height`` points"""
+        dpi = self.dpi
+        if self.max_pixels:
+            dpi = min(dpi, 72 * math.sqrt(self.max_pixels / (width * height)))
+        if self.max_dimension:
+            dpi = min(dpi, 72 * self.max_dimension / max(width, height))
+        return max(dpi, 1)
+
+
+def page_matrix(dpi):
+    import fitz
+    return fitz.Matrix(dpi/72, dpi/72)  # Convert to desired DPI
+
+
+class RenderCache:
+    """Bounded LRU of the rendered pixmaps of one document, spilling to disk.
+
+    Lets several outputs of the same file (say DOCX, PNG and JPG) share one
+    rasterization per page, DPI and colorspace. Pixmaps pushed out of memory
+    are kept as raw samples in a temporary folder. Once that folder is full
+    new spills are dropped rather than old ones: formats walk the pages in
+    order, so the oldest spilled pages are exactly the ones needed next.
+    """
+
+    def __init__(self, max_memory_mb=512, max_disk_mb=4096):
+        self.max_memory = max_memory_mb * 1024**2
+        self.max_disk = max_disk_mb * 1024**2
+        self.memory = OrderedDict()  # key -> pixmap, least recently used first
+        self.memory_bytes = 0
+        self.disk = {}  # key -> (path, colorspace, width, height, dpi)
+        self.disk_bytes = 0
+        self.spill_dir = None
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        import fitz
+        pix = self.memory.get(key)
+        if pix is not None:
+            self.memory.move_to_end(key)
+            self.hits += 1
+            return pix
+        if key not in self.disk:
+            self.misses += 1
+            return None
+
+        path, colorspace, width, height, dpi = self.disk.pop(key)
+        with open(path, 'rb') as f:
+            samples = f.read()
+        self.disk_bytes -= len(samples)
+        os.remove(path)
+        pix = fitz.Pixmap(fitz.csRGB if colorspace == "rgb" else fitz.csGRAY, width, height, samples, False)
+        pix.set_dpi(dpi, dpi)
+        self.hits += 1
+        self.put(key, pix)
+        return pix
+
+    def put(self, key, pix):
+        self.memory[key] = pix
+        self.memory_bytes += pix.size
+        while self.memory_bytes > self.max_memory and self.memory:
+            old_key, old_pix = self.memory.popitem(last=False)
+            self.memory_bytes -= old_pix.size
+            self.spill(old_key, old_pix)
+
+    def spill(self, key, pix):
+        size = len(pix.samples_mv)
+        if self.disk_bytes + size > self.max_disk:
+            return
+        if self.spill_dir is None:
+            self.spill_dir = tempfile.mkdtemp(prefix="pdf_render_")
+        handle, path = tempfile.mkstemp(suffix=".raw", dir=self.spill_dir)
+        with os.fdopen(handle, 'wb') as f:
+            f.write(pix.samples_mv)
+        colorspace = "rgb" if pix.n == 3 else "gray"
+        self.disk[key] = (path, colorspace, pix.width, pix.height, pix.xres)
+        self.disk_bytes += size
+
+    def close(self):
+        self.memory.clear()
+        self.disk.clear()
+        self.memory_bytes = self.disk_bytes = 0
+        if self.spill_dir:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+            self.spill_dir = None
+
+
+def render_pixmap(page, policy, cache=None):
+    """Rasterize ``page``; returns ``(pixmap, dpi)``"""
+    import fitz
+    dpi = policy.page_dpi(page.rect.width, page.rect.height)
+    colorspace = fitz.csRGB if policy.color_mode == "rgb" else fitz.csGRAY
+    key = (page.number, round(dpi, 3), policy.color_mode == "rgb")
+    pix = cache.get(key) if cache else None
+    if pix is not None:
+        return pix, round(dpi)
+
+    pix = page.get_pixmap(matrix=page_matrix(dpi), colorspace=colorspace)
+    pix.set_dpi(round(dpi), round(dpi))  # Keep the physical size in the image metadata
+    if cache:
+        cache.put(key, pix)
+    return pix, round(dpi)
+
+
+def save_image(image, target, dpi, policy):
+    """Write a PIL image to ``target`` (path or file object) as ``policy`` says"""
+    from PIL import Image
+    options = {"dpi": (dpi, dpi)}
+    if policy.encoding == "jpeg":
+        # JPEG has no 1-bit mode; mono pages are stored as grayscale
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        options.update(quality=policy.jpeg_quality, progressive=policy.progressive,
+                       optimize=policy.progressive)
+    else:
+        if policy.color_mode == "mono" and image.mode != "1":
+            image = image.convert("1", dither=Image.Dither.NONE)
+        if policy.encoding == "webp":
+            options["quality"] = policy.jpeg_quality
+    image.save(target, format=PIL_FORMATS[policy.encoding], **options)
+
+
+def encode_pixmap(pix, dpi, policy):
+    """Encode a rendered page to bytes.
+
+    Plain PNG stays with MuPDF's encoder, which is the quicker of the two;
+    everything else goes through Pillow, which also releases the GIL.
+    """
+    plain_png = policy.encoding == "png" and policy.color_mode != "mono"
+    try:
+        from PIL import Image
+    except ImportError:
+        if policy.encoding == "webp":
+            raise RuntimeError("Pillow is required for WebP output")
+        Image = None
+    if Image is None or plain_png:
+        if policy.encoding == "jpeg":
+            return pix.tobytes("jpeg", jpg_quality=policy.jpeg_quality)
+        # Without Pillow a grayscale PNG is the closest mono can get
+        return pix.tobytes("png")
+
+    mode = "RGB" if pix.n == 3 else "L"
+    image = Image.frombuffer(mode, (pix.width, pix.height), pix.samples_mv, "raw", mode, pix.stride, 1)
+    output = io.BytesIO()
+    save_image(image, output, dpi, policy)
+    return output.getvalue()
+
+
+def encodes_without_gil(policy):
+    """True when ``encode_pixmap`` uses Pillow, whose encoders let other threads run.
+
+    MuPDF holds the GIL while encoding, so its PNG/JPEG output gains nothing
+    from encoder threads.
+    """
+    plain_png = policy.encoding == "png" and policy.color_mode != "mono"
+    return not plain_png and importlib.util.find_spec("PIL") is not None
+
+
+def timed_encode(pix, dpi, policy):
+    started = time.perf_counter()
+    return encode_pixmap(pix, dpi, policy), time.perf_counter() - started
+
+
+def encode_page(pdf_document, page_num, policy, cache=None):
+    """Render one page and return ``(image_bytes, {"render": s, "encode": s})``"""
+    started = time.perf_counter()
+    pix, dpi = render_pixmap(pdf_document.load_page(page_num), policy, cache)
+    rendered = time.perf_counter()
+    image_bytes = encode_pixmap(pix, dpi, policy)
+    return image_bytes, {"render": rendered - started, "encode": time.perf_counter() - rendered}
+
+
+# Stop flag of a page worker process, installed by ``init_page_worker``
+_page_stop_event = None
+
+
+def init_page_worker(stop_event):
+    """Process pool initializer: share the pool's stop flag with this page worker"""
+    global _page_stop_event
+    _page_stop_event = stop_event
+    # Ctrl+C reaches the whole process group; only the parent decides to stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def page_worker_stopped():
+    return _page_stop_event is not None and _page_stop_event.is_set()
+
+
+def start_page_pool(workers):
+    """Spawn a page worker pool, returning ``(executor, stop_event)``"""
+    context = multiprocessing.get_context("spawn")
+    stop_event = context.Event()
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                   initializer=init_page_worker, initargs=(stop_event,))
+    return executor, stop_event
+
+
+def wait_for_chunk(future, stop_event, cancel_event=None):
+    """``future.result()``, telling the page workers to stop if ``cancel_event`` is set meanwhile.
+
+    Stopped workers return the pages they finished; the caller's own cancel
+    check discards them.
+    """
+    while cancel_event is not None and not future.done():
+        if cancel_event.is_set():
+            stop_event.set()
+            break
+        wait([future], timeout=CANCEL_POLL_SECONDS)
+    return future.result()
+
+
+def render_page_chunk(pdf_path, page_numbers, policy):
+    """Render ``page_numbers`` with a private document handle (runs in a worker).
+
+    Returns ``(open_seconds, [(page_num, image_bytes, timings), ...])``.
+    """
+    import fitz
+    started = time.perf_counter()
+    pdf_document = fitz.open(pdf_path)
+    open_seconds = time.perf_counter() - started
+    try:
+        rendered = []
+        for page_num in page_numbers:
+            if page_worker_stopped():
+                break
+            rendered.append((page_num, *encode_page(pdf_document, page_num, policy)))
+        return open_seconds, rendered
+    finally:
+        pdf_document.close()
+
+
+def split_pages(page_numbers, workers):
+    """Split pages into contiguous chunks, a few per worker for load balancing
+    and never more than ``MAX_CHUNK_PAGES`` each"""
+    page_numbers = list(page_numbers)
+    chunk_count = max(1, min(len(page_numbers), workers * CHUNKS_PER_WORKER))
+    size = min(-(-len(page_numbers) // chunk_count), MAX_CHUNK_PAGES)
+    return [page_numbers[i:i + size] for i in range(0, len(page_numbers), size)]
+
+
+def iter_rendered_pages(pdf_path, page_numbers, policy, page_workers=1, metrics=None, encode_threads=1,
+                        render_cache=None, cancel_event=None):
+    """Yield ``(page_num, image_bytes)`` in page order, entirely in memory.
+
+    With ``page_workers`` > 1 the pages are rendered by a process pool and put
+    back in order before being yielded. Only two chunks per worker, of at
+    most ``MAX_CHUNK_PAGES`` pages, are in flight at once, so memory stays
+    bounded however long the document is. Otherwise
+    pages render here and, with ``encode_threads`` > 1 and a Pillow encoding,
+    are encoded on a thread pool with at most ``ENCODE_WINDOW_BYTES`` of
+    raw pixmaps waiting, and a ``RenderCache``
+    can hand back pages an earlier output of the same file already rendered.
+    Render and encode times go to ``metrics`` if given. Setting
+    ``cancel_event`` stops the page workers at their next page.
+    """
+    page_numbers = list(page_numbers)
+
+    if page_workers <= 1 or len(page_numbers) < 2:
+        import fitz
+        started = time.perf_counter()
+        pdf_document = fitz.open(pdf_path)
+        if metrics:
+            metrics.add_time("open", time.perf_counter() - started)
+        try:
+            if encode_threads <= 1 or len(page_numbers) < 2 or not encodes_without_gil(policy):
+                for page_num in page_numbers:
+                    image_bytes, timings = encode_page(pdf_document, page_num, policy, render_cache)
+                    if metrics:
+                        metrics.add_page(page_num, **timings)
+                    yield page_num, image_bytes
+                return
+
+            with ThreadPoolExecutor(max_workers=encode_threads) as executor:
+                pending = deque()
+
+                def oldest():
+                    page_num, future, render_seconds, _ = pending.popleft()
+                    image_bytes, encode_seconds = future.result()
+                    if metrics:
+                        metrics.add_page(page_num, render=render_seconds, encode=encode_seconds)
+                    return page_num, image_bytes
+
+                def waiting_bytes():
+                    return sum(size for _, future, _, size in pending if not future.done())
+
+                for page_num in page_numbers:
+                    started = time.perf_counter()
+                    pix, dpi = render_pixmap(pdf_document.load_page(page_num), policy, render_cache)
+                    pending.append((page_num, executor.submit(timed_encode, pix, dpi, policy),
+                                    time.perf_counter() - started, pix.stride * pix.height))
+                    pix = None
+                    # Bound the raw pixmaps waiting for an encoder, by count and by size
+                    while pending and (len(pending) > encode_threads * 2
+                                       or waiting_bytes() > ENCODE_WINDOW_BYTES):
+                        yield oldest()
+                while pending:
+                    yield oldest()
+        finally:
+            pdf_document.close()
+        return
+
+    chunks = deque(split_pages(page_numbers, page_workers))
+    workers = min(page_workers, len(chunks))
+    executor, stop_event = start_page_pool(workers)
+    with executor:
+        pending = deque()
+        try:
+            while chunks or pending:
+                while chunks and len(pending) < workers * 2:
+                    pending.append(executor.submit(render_page_chunk, pdf_path, chunks.popleft(), policy))
+                # Oldest chunk first keeps the output in page order
+                open_seconds, rendered = wait_for_chunk(pending.popleft(), stop_event, cancel_event)
+                if metrics:
+                    metrics.add_time("open", open_seconds)
+                for page_num, image_bytes, timings in rendered:
+                    if metrics:
+                        metrics.add_page(page_num, **timings)
+                    yield page_num, image_bytes
+        finally:
+            # The consumer stopped early (e.g. cancelled): drop the work still queued
+            stop_event.set()
+            for future in pending:
+                future.cancel()
@@ -0,0 +1,372 @@
+"""Long-lived conversion service fed from a spool directory.
+
+Paying interpreter startup plus PyMuPDF/python-docx imports for every job
+dominates throughput on tens of thousands of small PDFs. The service keeps a
+pool of warm worker processes instead and takes jobs from a spool folder::
+
+    <spool>/incoming/<id>.json   jobs waiting (clients write .tmp then rename)
+    <spool>/working/<id>.json    jobs claimed by the service
+    <spool>/done/<id>.json       result dicts, same shape as the CLI prints
+    <spool>/failed/<id>.json     malformed jobs, set aside (their result is in done/)
+
+Workers are recycled after ``max_jobs`` conversions or once their resident
+memory passes ``max_rss_mb``, which contains leaks in the native libraries.
+
+    python worker_service.py serve spool/ -w 4 --max-jobs 500 --max-rss-mb 800
+    python worker_service.py submit spool/ scans/*.pdf -f docx -o out/ --wait
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+import importlib
+import multiprocessing
+from dataclasses import asdict, fields
+from multiprocessing.connection import wait
+
+from converter_engine import (ConversionSettings, OUTPUT_FORMATS, ReservedNames, base_result,
+                              check_available_libraries, convert_one, default_workers, log_to_stderr,
+                              page_range_argument, unique_output_path)
+from converter_registry import LIBRARY_MODULES
+
+SPOOL_FOLDERS = ["incoming", "working", "done", "failed"]
+
+
+def current_rss_mb():
+    """Resident memory of this process, or None where it cannot be read"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 1024**2
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Peak rather than current memory, still good enough to spot a leak
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024**2 if sys.platform == "darwin" else 1024)
+
+
+def warm_up(libraries):
+    """Import every available conversion library once, up front"""
+    for key, module in LIBRARY_MODULES.items():
+        if libraries.get(key):
+            try:
+                importlib.import_module(module)
+            except Exception:
+                pass
+
+
+def settings_from_dict(values):
+    """Build ConversionSettings from a job, ignoring keys this version does not know"""
+    known = {field.name for field in fields(ConversionSettings)}
+    if not isinstance(values, dict):
+        values = {}
+    return ConversionSettings(**{name: value for name, value in values.items() if name in known})
+
+
+def validate_job(job):
+    """Raise ValueError unless ``job`` has the shape ``submit`` writes"""
+    if not isinstance(job, dict):
+        raise ValueError("job is not a JSON object")
+    if not isinstance(job.get("input"), str) or not job["input"]:
+        raise ValueError("job has no input path")
+    if job.get("settings") is not None and not isinstance(job["settings"], dict):
+        raise ValueError("job settings are not a JSON object")
+    for key in ("output", "output_dir"):
+        if job.get(key) is not None and not isinstance(job[key], str):
+            raise ValueError(f"job {key} is not a path")
+
+
+def worker_main(connection, max_jobs, max_rss_mb):
+    """Worker process loop: receive a job, send back its result, retire when worn out"""
+    libraries = check_available_libraries()
+    warm_up(libraries)
+    connection.send({"ready": True})
+
+    jobs_done = 0
+    while True:
+        try:
+            job = connection.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+
+        try:
+            result = convert_one(job["input"], job["output"], settings_from_dict(job.get("settings")), libraries)
+        except Exception as e:
+            # convert_one reports conversion errors itself; this catches anything odd about the job
+            result = base_result(job.get("input"), None, ConversionSettings(), f"Worker failed: {e!r}")
+        jobs_done += 1
+        rss = current_rss_mb()
+        retire = bool((max_jobs and jobs_done >= max_jobs) or (max_rss_mb and rss and rss > max_rss_mb))
+        connection.send({"result": result, "retire": retire})
+        if retire:
+            break
+    connection.close()
+
+
+class Worker:
+    def __init__(self, context, max_jobs, max_rss_mb):
+        self.connection, child_connection = context.Pipe()
+        # Not a daemon: convert_one may start its own page worker processes
+        self.process = context.Process(target=worker_main, args=(child_connection, max_jobs, max_rss_mb))
+        self.process.start()
+        child_connection.close()
+        self.ready = False
+        self.job = None  # Job dict currently being converted
+
+
+def write_json(path, data):
+    # Write then rename so readers never see a half-written file
+    temp_path = path + ".tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(temp_path, path)
+
+
+class WorkerService:
+    def __init__(self, spool_dir, workers=1, max_jobs=500, max_rss_mb=1024,
+                 poll_interval=0.2, on_result=None, log=log_to_stderr):
+        self.spool_dir = spool_dir
+        self.workers = max(1, workers)
+        self.max_jobs = max_jobs
+        self.max_rss_mb = max_rss_mb
+        self.poll_interval = poll_interval
+        self.on_result = on_result
+        self.log = log
+        self.folders = {name: os.path.join(spool_dir, name) for name in SPOOL_FOLDERS}
+        # Output paths handed out but maybe not written yet
+        self.reserved = ReservedNames()
+        self.pool = []
+        self.queued = []
+
+    def prepare_spool(self):
+        for folder in self.folders.values():
+            os.makedirs(folder, exist_ok=True)
+        # Jobs claimed by a service that died are put back in line
+        for name in os.listdir(self.folders["working"]):
+            if name.endswith(".json"):
+                os.replace(os.path.join(self.folders["working"], name),
+                           os.path.join(self.folders["incoming"], name))
+
+    def claim_jobs(self, limit):
+        """Move up to ``limit`` waiting jobs into working/, oldest first"""
+        incoming = self.folders["incoming"]
+        try:
+            entries = [entry for entry in os.scandir(incoming) if entry.name.endswith(".json")]
+        except OSError:
+            return
+
+        def age(entry):
+            try:
+                return entry.stat().st_mtime_ns
+            except FileNotFoundError:
+                # Claimed by another service since the scan; the rename below skips it
+                return 0
+        entries.sort(key=age)
+
+        for entry in entries[:limit]:
+            job_id = entry.name[:-len(".json")]
+            working_path = os.path.join(self.folders["working"], entry.name)
+            try:
+                os.replace(entry.path, working_path)
+            except OSError:
+                # Another service sharing the spool took it first
+                continue
+            job = None
+            try:
+                with open(working_path, encoding='utf-8') as f:
+                    job = json.load(f)
+                validate_job(job)
+                # The file name is the id clients wait on (and what finish removes)
+                job["id"] = job_id
+                self.queued.append(self.plan(job))
+            except (OSError, ValueError) as e:
+                # A malformed job fails on its own instead of stopping the service
+                self.reject(job_id, job, f"Unreadable job: {e}")
+
+    def reject(self, job_id, job, error):
+        """Set a job that cannot run aside in failed/ and report why"""
+        try:
+            os.replace(os.path.join(self.folders["working"], f"{job_id}.json"),
+                       os.path.join(self.folders["failed"], f"{job_id}.json"))
+        except OSError:
+            pass
+        file_path = job.get("input") if isinstance(job, dict) and isinstance(job.get("input"), str) else None
+        self.finish({"id": job_id}, base_result(file_path, None, ConversionSettings(), error))
+
+    def plan(self, job):
+        """Fill in the output path when the client only named an output folder"""
+        if not job.get("output"):
+            settings = settings_from_dict(job.get("settings"))
+            output_dir = job.get("output_dir") or os.path.dirname(os.path.abspath(job["input"]))
+            os.makedirs(output_dir, exist_ok=True)
+            file_name = os.path.splitext(os.path.basename(job["input"]))[0]
+            job["output"] = unique_output_path(output_dir, file_name, settings.output_format, self.reserved)
+        return job
+
+    def finish(self, job, result):
+        result["id"] = job["id"]
+        self.reserved.discard(result.get("output"))
+        write_json(os.path.join(self.folders["done"], f"{job['id']}.json"), result)
+        try:
+            os.remove(os.path.join(self.folders["working"], f"{job['id']}.json"))
+        except OSError:
+            pass
+        if self.on_result:
+            self.on_result(result)
+
+    def replace_worker(self, worker, context):
+        self.pool.remove(worker)
+        worker.connection.close()
+        worker.process.join(timeout=5)
+        self.pool.append(Worker(context, self.max_jobs, self.max_rss_mb))
+
+    def run(self, stop_event=None):
+        """Serve jobs until ``stop_event`` is set (or forever)"""
+        self.prepare_spool()
+        # Spawn rather than fork so every worker starts from a clean interpreter
+        context = multiprocessing.get_context("spawn")
+        self.pool = [Worker(context, self.max_jobs, self.max_rss_mb) for _ in range(self.workers)]
+        self.log(f"Serving {os.path.abspath(self.spool_dir)} with {self.workers} workers")
+
+        try:
+            while not (stop_event and stop_event.is_set()):
+                # Keep only a small backlog claimed so other services can share the spool
+                if len(self.queued) < self.workers:
+                    self.claim_jobs(self.workers * 2 - len(self.queued))
+
+                for worker in self.pool:
+                    if worker.ready and worker.job is None and self.queued:
+                        worker.job = self.queued.pop(0)
+                        worker.connection.send(worker.job)
+
+                connections = [worker.connection for worker in self.pool]
+                sentinels = [worker.process.sentinel for worker in self.pool]
+                ready = wait(connections + sentinels, timeout=self.poll_interval)
+
+                for worker in list(self.pool):
+                    if worker.connection in ready:
+                        try:
+                            message = worker.connection.recv()
+                        except EOFError:
+                            message = None
+                        if message and message.get("ready"):
+                            worker.ready = True
+                            continue
+                        if message and "result" in message:
+                            job, worker.job = worker.job, None
+                            self.finish(job, message["result"])
+                            if message["retire"]:
+                                self.replace_worker(worker, context)
+                            continue
+                    if worker.process.sentinel in ready or not worker.process.is_alive():
+                        # The worker died (e.g. a native crash inside PyMuPDF)
+                        if worker.job is not None:
+                            settings = settings_from_dict(worker.job.get("settings"))
+                            self.finish(worker.job, base_result(
+                                worker.job.get("input"), None, settings,
+                                f"Worker failed: exit code {worker.process.exitcode}"))
+                        self.replace_worker(worker, context)
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        for worker in self.pool:
+            try:
+                worker.connection.send(None)
+            except (OSError, ValueError):
+                pass
+        for worker in self.pool:
+            worker.process.join(timeout=10)
+            if worker.process.is_alive():
+                worker.process.terminate()
+        self.pool = []
+
+
+def submit(spool_dir, input_path, settings, output_path=None, output_dir=None):
+    """Queue one conversion and return its job id"""
+    incoming = os.path.join(spool_dir, "incoming")
+    os.makedirs(incoming, exist_ok=True)
+    job_id = uuid.uuid4().hex
+    job = {
+        "id": job_id,
+        "input": os.path.abspath(input_path),
+        "output": os.path.abspath(output_path) if output_path else None,
+        "output_dir": os.path.abspath(output_dir) if output_dir else None,
+        "settings": asdict(settings),
+    }
+    write_json(os.path.join(incoming, f"{job_id}.json"), job)
+    return job_id
+
+
+def wait_for_result(spool_dir, job_id, timeout=None, poll_interval=0.1):
+    """Block until the job's result appears, returning it (None on timeout)"""
+    result_path = os.path.join(spool_dir, "done", f"{job_id}.json")
+    deadline = time.monotonic() + timeout if timeout else None
+    while not os.path.exists(result_path):
+        if deadline and time.monotonic() > deadline:
+            return None
+        time.sleep(poll_interval)
+    with open(result_path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Warm worker-pool conversion service fed from a spool folder.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve = commands.add_parser("serve", help="Run the service")
+    serve.add_argument("spool", help="Spool folder shared with clients")
+    serve.add_argument("-w", "--workers", type=int, default=0,
+                       help="Worker processes (default: one per CPU)")
+    serve.add_argument("--max-jobs", type=int, default=500,
+                       help="Recycle a worker after this many conversions (0 = never)")
+    serve.add_argument("--max-rss-mb", type=int, default=1024,
+                       help="Recycle a worker once its memory passes this (0 = never)")
+
+    client = commands.add_parser("submit", help="Queue PDFs for a running service")
+    client.add_argument("spool", help="Spool folder the service watches")
+    client.add_argument("inputs", nargs="+", help="PDF files to convert")
+    client.add_argument("-f", "--format", choices=OUTPUT_FORMATS, default="docx")
+    client.add_argument("-o", "--output-dir", help="Output folder (default: next to each input)")
+    client.add_argument("--dpi", type=int, help="Rendering DPI (overrides --draft)")
+    client.add_argument("--draft", action="store_true", help="Lower DPI for faster conversion")
+    client.add_argument("--pages", type=page_range_argument, help="Only convert these pages, e.g. \"1-3,10,-1\"")
+    client.add_argument("--first-pages", type=int, help="Only convert the first N (selected) pages")
+    client.add_argument("--wait", action="store_true", help="Print each result as JSON once it is done")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        service = WorkerService(args.spool, args.workers or default_workers(),
+                                args.max_jobs, args.max_rss_mb)
+        try:
+            service.run()
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    settings = ConversionSettings(output_format=args.format, high_quality=not args.draft, dpi=args.dpi,
+                                  pages=args.pages, first_pages=args.first_pages)
+    job_ids = [submit(args.spool, path, settings, output_dir=args.output_dir) for path in args.inputs]
+    if not args.wait:
+        for job_id in job_ids:
+            print(job_id)
+        return 0
+
+    failed = 0
+    for job_id in job_ids:
+        result = wait_for_result(args.spool, job_id)
+        failed += not result["success"]
+        print(json.dumps(result), flush=True)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())